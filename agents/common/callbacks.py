@@ -0,0 +1,38 @@
+from __future__ import annotations
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """1ターン中の LLM 呼び出し回数を数える。"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.calls += 1
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+
+
+_current: contextvars.ContextVar[LLMCallCounter | None] = contextvars.ContextVar("llm_call_counter", default=None)
+
+
+@contextmanager
+def count_llm_calls() -> Iterator[LLMCallCounter]:
+    """with ブロック内で turn_callbacks() を渡した LLM 呼び出しを数える。"""
+    counter = LLMCallCounter()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+def turn_callbacks() -> List[BaseCallbackHandler]:
+    c = _current.get()
+    return [c] if c is not None else []
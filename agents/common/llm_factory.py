@@ -17,6 +17,11 @@ def _openai_model(default: str = "google/gemma-3-12b-it") -> str:
     return os.getenv("OPENAI_MODEL", default)
 
 
+def _stub_base_url() -> str:
+    # bench/stub_llm.py の既定ポート
+    return _openai_base_url() or "http://127.0.0.1:8765/v1"
+
+
 def get_llm(temperature: float = 0.2):
     """通常応答用"""
     if PROVIDER == "azure":
@@ -36,6 +41,14 @@ def get_llm(temperature: float = 0.2):
             temperature=temperature,
             streaming=False,
         )
+    elif PROVIDER == "stub":
+        # ローカルのスタブサーバー（オフライン計測用）
+        return ChatOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY") or "stub",
+            base_url=_stub_base_url(),
+            model=_openai_model("stub-model"),
+            temperature=temperature,
+        )
     else:
         # Bedrock
         model_id = os.getenv("BEDROCK_MODEL_ID")
@@ -66,6 +79,14 @@ def get_llm_json(temperature: float = 0.0):
             temperature=0.0,
             streaming=False,
         )
+    elif PROVIDER == "stub":
+        return ChatOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY") or "stub",
+            base_url=_stub_base_url(),
+            model=_openai_model("stub-model"),
+            temperature=0.0,
+            model_kwargs={"response_format": {"type": "json_object"}},
+        )
     else:
         model_id = os.getenv("BEDROCK_MODEL_ID")
         return ChatBedrockConverse(
@@ -4,7 +4,8 @@ from datetime import datetime, date as ddate
 from zoneinfo import ZoneInfo
 import datetime as _dt
 import dateparser
-from typing import Dict
+
+from tenants.registry import current_pack
 
 JST = ZoneInfo("Asia/Tokyo")
 
@@ -42,19 +43,14 @@ def check_collectible(date_iso: str, address: str) -> str:
         d = _dt.date.fromisoformat(date_iso)
     except Exception:
         return "ng: 日付形式エラー"
-    if d.weekday() == 6:
-        return "ng: 日曜日は回収不可です"
-    if (d.month, d.day) in {(1,1), (12,31)}:
-        return "ng: 祝日/年末年始は回収不可です"
-    return "ok"
-
-_PRICE_TABLE: Dict[str,int] = {"ソファ": 1200, "マットレス": 800, "机": 700, "椅子": 300}
+    # 回収不可の曜日/日付・地区ごとの収集曜日は自治体のルールパックに従う
+    return current_pack().check_collectible(d, address)
 
 @tool
 def estimate_fee(item_description: str, quantity: int, size_hint: str = "") -> dict:
-    """料金概算を返す。未知品目は500円。
+    """料金概算を返す。未知品目は自治体の既定料金。
     入力: item_description, quantity, size_hint(任意)"""
-    unit = _PRICE_TABLE.get(item_description, 500)
+    unit = current_pack().price(item_description)
     qty = max(1, int(quantity or 1))
     return {"unit": unit, "subtotal": unit * qty, "notes": ""}
 
@@ -64,9 +60,7 @@ def rag_search(query: str) -> str:
     FAQ検索。ユーザーとの会話の中で、制度・ルールの質問があった際に使う。
     入力: 質問文の全文
     """
-    if "サイズ" in query or "大きさ" in query:
-        return "最大辺が2mを超えるものは個別相談となります。詳しくは市の案内をご参照ください。"
-    return "市の粗大ごみ案内ページをご確認ください。"
+    return current_pack().faq(query)
 
 @tool
 def reserve(req_json: dict) -> dict:
@@ -4,11 +4,12 @@ import os
 import re
 import json
 from datetime import date
-from typing import List
+from typing import Dict, List
 from zoneinfo import ZoneInfo
 
 from langchain_openai import AzureChatOpenAI
 from langchain.agents import create_tool_calling_agent, create_react_agent, AgentExecutor
+from langchain.agents.agent_iterator import AgentExecutorIterator
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.exceptions import OutputParserException
 from langchain.tools.render import render_text_description
@@ -22,6 +23,9 @@ from .schema import (
 from .prompts import make_extract_prompt, agent_system
 from agents.common.tools import resolve_date, check_collectible, estimate_fee, rag_search
 from agents.common.llm_factory import get_llm, get_llm_json
+from agents.common.callbacks import turn_callbacks
+from tenants.registry import current_pack
+from tenants.rulepack import RulePack
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -33,32 +37,26 @@ PRIORITY = [
     "preferred_date", "time_slot", "pickup_location", "notes"
 ]
 
-FIELD_LABEL = {
-    "name": "お名前（フルネーム・カタカナ）",
-    "address": "ご住所（市区町村〜番地）",
-    "phone": "お電話番号（数字のみ）",
-    "item_description": "回収物の品目",
-    "quantity": "個数（半角数字）",
-    "preferred_date": "希望日（YYYY-MM-DD もしくは『来週火曜』でも可）",
-    "time_slot": "時間帯（午前/午後）",
-    "pickup_location": "回収場所（自宅前/集合所 など）",
-}
-
-FIELD_EXAMPLE = {
-    "name": "アイウエオ タロウ",
-    "address": "大阪市北区中之島1-1-1",
-    "phone": "09012345678",
-    "item_description": "ソファ",
-    "quantity": "1",
-    "preferred_date": "2025-08-22",
-    "time_slot": "午前",
-    "pickup_location": "自宅前",
-}
-
 # 出力契約：エージェントが最後に返す“印”と request 同梱
 _RESP_KIND = re.compile(r"\[(ASK|REVIEW|ANSWER)\]")
 _REQ_BLOCK = re.compile(r"\[REQUEST_JSON\](.*?)\[/REQUEST_JSON\]", re.DOTALL)
 
+# 事前計算の判定用：日付らしき表現（修飾語ごと広めに拾う）と、FAQになりうる質問文
+_DATE_PHRASE = re.compile(
+    r"(?:(?:再?来|今|先|翌)(?:週|月)の?)?(?:第\d)?[月火水木金土日]曜日?"
+    r"|明後日|明日|あさって|\d{1,2}/\d{1,2}|\d{1,2}月\d{1,2}日"
+)
+# 事前に resolve_date してよい表現（resolve_date が正しく解釈できるものだけ）。
+# 拾った日付表現の全体がこれに一致するときだけ使い、『来週火曜』『あさって』などは LLM に任せる
+# （『10/3』のような2桁の月は年と解釈されるため対象外）
+_SUPPORTED_DATE = re.compile(r"[月火水木金土日]曜日|明後日|明日|[1-9]/\d{1,2}")
+_QUESTION = re.compile(r"[？?]|(ますか|ですか|でしょうか)$")
+
+# ツール呼び出しループの上限（最終応答の1回を含む）
+MAX_ITERATIONS = 3
+# ツールを呼ぶ可能性がある限り、ツール1回＋最終応答1回ぶんは確保する
+MIN_ITERATIONS = 2
+
 
 # ===== LLM 初期化 =====
 @lru_cache(maxsize=1)
@@ -99,7 +97,7 @@ def extract_fields(user_utterance: str, today_iso: str) -> GarbageRequest:
     else:
         llm = _get_llm_json()
 
-    chain = prompt | llm | parser
+    chain = (prompt | llm | parser).with_config(callbacks=turn_callbacks())
     #return chain.invoke({"user_utterance": user_utterance})
     return _invoke_with_retry(chain, {"user_utterance": user_utterance})
 
@@ -128,12 +126,12 @@ def _merge(base: GarbageRequest, new: GarbageRequest) -> GarbageRequest:
     return GarbageRequest(**b)
 
 
-def _missing(req: GarbageRequest) -> List[str]:
+def missing_fields(req: GarbageRequest) -> List[str]:
     return [f for f in REQUIRED_FIELDS if not getattr(req, f)]
 
 
 # 次に聞く項目を選ぶ
-def _pick_next_field(missing: list[str]) -> str:
+def pick_next_field(missing: list[str]) -> str:
     # PRIORITY に基づき最初の1つを返す
     for f in PRIORITY:
         if f in missing:
@@ -142,9 +140,11 @@ def _pick_next_field(missing: list[str]) -> str:
     return missing[0]
 
 
-def _make_question_for(field: str) -> str:
-    label = FIELD_LABEL.get(field, field)
-    ex = FIELD_EXAMPLE.get(field, "")
+def make_question_for(field: str) -> str:
+    # 項目ラベル/記入例は自治体のルールパックから引く
+    pack = current_pack()
+    label = pack.field_label(field)
+    ex = pack.field_example(field)
     # 丁寧かつ短文、1項目のみ
     msg = f"ありがとうございます。次に **{label}** を教えてください。"
     if ex:
@@ -183,13 +183,84 @@ def _parse_agent_response(text: str, base_req: GarbageRequest) -> tuple[str, Gar
     return kind, req, message
 
 
+# ===== ツールの事前計算 =====
+def _date_phrase(utterance: str) -> tuple[str, bool]:
+    """発話中の日付表現と、それを事前に resolve_date してよいか。"""
+    m = _DATE_PHRASE.search(utterance or "")
+    if not m:
+        return "", False
+    return m.group(0), bool(_SUPPORTED_DATE.fullmatch(m.group(0)))
+
+
+def _precompute_tools(req: GarbageRequest, utterance: str, today_iso: str) -> Dict[str, str]:
+    """入力が揃っているツールを LLM を介さずに先に実行し、結果を context に載せる。"""
+    results: Dict[str, str] = {}
+    date_iso = req.preferred_date
+    phrase, supported = _date_phrase(utterance)
+    if phrase:
+        # この発話で日付を指定・変更しているので、手元の日付は使わない。
+        # 解決できなければ可否判定もしない（古い日付の判定結果を載せない）
+        resolved = resolve_date.invoke({"text": phrase, "base_date": today_iso}) if supported else ""
+        if resolved:
+            results["resolve_date"] = f"『{phrase}』→ {resolved}"
+        date_iso = resolved or None
+    if date_iso and req.address:
+        ok = check_collectible.invoke({"date_iso": date_iso, "address": req.address})
+        results["check_collectible"] = f"{date_iso}: {ok}"
+    if req.item_description and req.quantity:
+        f = estimate_fee.invoke({"item_description": req.item_description, "quantity": req.quantity})
+        results["estimate_fee"] = json.dumps(f, ensure_ascii=False)
+    return results
+
+
+def _iteration_budget(precomputed: Dict[str, str], utterance: str) -> int:
+    """最終応答の1回 + まだ解決していないツール呼び出しの回数（MIN_ITERATIONS〜MAX_ITERATIONS）。
+
+    上限に達した時点でループは強制終了するので、ツールが呼ばれうる限り下限は MIN_ITERATIONS。
+    """
+    unresolved = 0
+    phrase, _ = _date_phrase(utterance)
+    if phrase and "resolve_date" not in precomputed:
+        unresolved += 1
+    if _QUESTION.search((utterance or "").strip()):
+        unresolved += 1  # rag_search / 可否判定の追加確認
+    return max(MIN_ITERATIONS, min(MAX_ITERATIONS, 1 + unresolved))
+
+
+def _action_text(action) -> str:
+    msgs = getattr(action, "message_log", None) or []
+    return "".join(str(getattr(m, "content", "") or "") for m in msgs) or getattr(action, "log", "")
+
+
+def _invoke_agent(executor: AgentExecutor, inputs: dict) -> str:
+    """エージェントを1ステップずつ回し、最終印（[ASK]/[REVIEW]/[ANSWER]）が出た時点で打ち切る。
+
+    ツール呼び出しと同時に最終応答を書いてくるモデルもあるため、その場合はツールを実行せずに返す。
+    反復上限で打ち切られた場合（印のない停止メッセージ）は空文字を返し、呼び出し側の定型質問に任せる。
+    """
+    it = AgentExecutorIterator(executor, inputs, callbacks=turn_callbacks(), yield_actions=True)
+    for chunk in it:
+        if "output" in chunk:
+            output = str(chunk["output"])
+            limit = executor.max_iterations
+            if not _RESP_KIND.search(output) and limit is not None and it.iterations >= limit:
+                return ""
+            return output
+        for action in chunk.get("actions", []):
+            text = _action_text(action)
+            if _RESP_KIND.search(text):
+                return text
+    return ""
+
+
 # ===== エージェント本体 =====
-def build_agent_executor() -> AgentExecutor:
+def build_agent_executor(max_iterations: int = MAX_ITERATIONS, pack: RulePack | None = None) -> AgentExecutor:
     llm = _get_llm()
     tools = [resolve_date, check_collectible, estimate_fee, rag_search]
 
     tools_str = render_text_description(tools)
-    prompt = agent_system.partial(tools=tools_str)
+    pack = pack or current_pack()
+    prompt = agent_system.partial(tools=tools_str, municipality_rules=pack.prompt_rules)
 
     agent = create_tool_calling_agent(llm, tools, prompt)
 
@@ -199,7 +270,7 @@ def build_agent_executor() -> AgentExecutor:
             tools=tools,
             verbose=True,
             handle_parsing_errors=True,
-            max_iterations=3,
+            max_iterations=max_iterations,
             stream_runnable=False,
         )
     return AgentExecutor(
@@ -207,41 +278,45 @@ def build_agent_executor() -> AgentExecutor:
         tools=tools,
         verbose=True,
         handle_parsing_errors=True,
-        max_iterations=3,
+        max_iterations=max_iterations,
     )
 
 
 def run(input: AgentInput) -> AgentOutput:
     extracted = extract_fields(input.user_utterance, input.context_today_iso)
     req = _merge(input.request, extracted)
-    miss = _missing(req)
+    miss = missing_fields(req)
 
-    agent = build_agent_executor()
+    precomputed = _precompute_tools(req, input.user_utterance, input.context_today_iso)
+    agent = build_agent_executor(max_iterations=_iteration_budget(precomputed, input.user_utterance))
 
     task = f"""
 today_jst: {input.context_today_iso}
+municipality: {input.municipality}
 request (現時点の値):
 {json.dumps(req.model_dump(), indent=2, ensure_ascii=False)}
 missing: {", ".join(miss) if miss else "(なし)"}
+precomputed_tools (事前計算済み・再実行不要):
+{chr(10).join(f"- {k}: {v}" for k, v in precomputed.items()) if precomputed else "(なし)"}
 """
 
-    result = agent.invoke({
+    raw = _invoke_agent(agent, {
         "input": input.user_utterance,   # ← 重要: {input} に対応
         "context": task,                 # ← prompts側の {context}
-    })
-
-    raw = str(result.get("output", "")).strip()
+        "history": input.history,
+        "history_summary": input.history_summary or "(なし)",
+    }).strip()
     kind, new_req, message = _parse_agent_response(raw or "", req)
 
     if not message:
-        miss = _missing(new_req)
-        next_f = _pick_next_field(miss) if miss else None
-        msg = _make_question_for(next_f) if next_f else "内容を理解しました。"
+        miss = missing_fields(new_req)
+        next_f = pick_next_field(miss) if miss else None
+        msg = make_question_for(next_f) if next_f else "内容を理解しました。"
         return AgentAsk(message=msg, missing=miss, next_field=next_f or "", request=new_req)
 
     if kind == "ASK":
-        miss_now = _missing(new_req)
-        next_f = _pick_next_field(miss_now) if miss_now else ""
+        miss_now = missing_fields(new_req)
+        next_f = pick_next_field(miss_now) if miss_now else ""
         return AgentAsk(message=message, missing=miss_now, next_field=next_f, request=new_req)
 
     if kind == "REVIEW":
@@ -254,6 +329,6 @@ missing: {", ".join(miss) if miss else "(なし)"}
     if kind == "ANSWER":
         return AgentAnswer(message=message)
 
-    miss_now = _missing(new_req)
-    next_f = _pick_next_field(miss_now) if miss_now else ""
+    miss_now = missing_fields(new_req)
+    next_f = pick_next_field(miss_now) if miss_now else ""
     return AgentAsk(message=message, missing=miss_now, next_field=next_f, request=new_req)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from langchain.prompts import ChatPromptTemplate
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 # 構造化抽出（JSON専用）
 def make_extract_prompt(format_instructions: str):
@@ -19,7 +19,7 @@ agent_system = ChatPromptTemplate.from_messages([
      "あなたは自治体の粗大ごみ申込アシスタントです。目的は申込に必要な情報を揃えること。\n"
      "【対話方針】\n"
      "- ユーザーが『可否の質問（例：◯/◯は回収できますか？）』をした場合は、まず可能な範囲で **即答** する。\n"
-     "  ・日曜/1月1日/12月31日などの一律NGは、住所が未取得でも『不可』と即答してよい。\n"
+     "  ・【自治体固有のルール】にある一律NGの曜日/日付は、住所が未取得でも『不可』と即答してよい。\n"
      "  ・それ以外は、住所と希望日が揃ったら `check_collectible` で判定する。住所が無い場合は、可否に必要な **最小限の質問（住所）** のみを先に聞く。\n"
      "- 情報に不足があれば、優先度に従い“1項目だけ”丁寧に質問する。ただし、状況に応じて順番を入れ替えてもよい。（優先度: name > address > phone > item_description > quantity > preferred_date > time_slot > pickup_location）。\n"
      "- ユーザーが相対/曖昧な日付（例：来週水曜、明後日 等）を述べたときは resolve_date で YYYY-MM-DD に正規化し、"
@@ -27,6 +27,7 @@ agent_system = ChatPromptTemplate.from_messages([
      "- preferred_date と address が揃ったら check_collectible を使う。NGなら代替案を簡潔に提案して [ASK]。\n"
      "- item_description と quantity が揃ったら estimate_fee で概算料金を出し、[REVIEW] に金額を含める。\n"
      "- 制度/ルール等のFAQは rag_search を使って短く回答し、その後は不足収集に戻る（通常は[ASK]）。\n"
+     "- 状況コンテキストの precomputed_tools にある結果はそのまま使い、同じツールを再実行しない。\n"
      "【出力形式（厳守）】\n"
      "1) 先頭行に [ASK] / [REVIEW] / [ANSWER] のいずれか\n"
      "2) ユーザーに見せる本文（丁寧・簡潔）\n"
@@ -35,7 +36,19 @@ agent_system = ChatPromptTemplate.from_messages([
      "<GarbageRequest-compatible JSON here>\n"
      "[/REQUEST_JSON]\n"
      "【利用可能ツール】\n{tools}\n"
+     "【自治体固有のルール】\n{municipality_rules}\n"
      "【状況コンテキスト】\n{context}\n"
+     "【これまでの会話の要約】\n{history_summary}\n"
      "【これまでのツール実行ログ】\n{agent_scratchpad}"),
+    MessagesPlaceholder("history", optional=True),
     ("human", "{input}"),
+])
+
+# 履歴要約用（窓から外れたターンを既存要約に畳み込む）
+history_summary_prompt = ChatPromptTemplate.from_messages([
+    ("system",
+     "あなたは自治体窓口の記録係です。これまでの要約と新しい会話ログから、"
+     "申込内容・ユーザーの希望・未解決の質問だけを箇条書きで簡潔にまとめ直してください。"
+     "挨拶や重複は省きます。"),
+    ("user", "【これまでの要約】\n{summary}\n【新しい会話ログ】\n{dialog}"),
 ])
\ No newline at end of file
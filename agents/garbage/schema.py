@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional, List, Literal, Union
+from typing import Optional, List, Literal, Tuple, Union
 from pydantic import BaseModel, Field
 
 class GarbageRequest(BaseModel):
@@ -25,9 +25,14 @@ class FeeQuote(BaseModel):
 
 class AgentInput(BaseModel):
     thread_id: str
+    municipality: str = "default"                                  # ルールパックID（自治体）
     user_utterance: str
     context_today_iso: str
     request: GarbageRequest
+    history: List[Tuple[str, str]] = Field(default_factory=list)  # 直近ターン (role, content)
+    history_summary: str = ""                                      # 窓から外れたターンの要約
+    pending_confirmation: bool = False                             # レビュー提示後の確認待ちか
+    last_review_text: str = ""                                     # 確認待ち中に再提示するレビュー文
 
 class AgentAsk(BaseModel):
     kind: Literal["ask"] = "ask"
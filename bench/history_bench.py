@@ -0,0 +1,67 @@
+"""長い合成会話で履歴窓のプロンプトトークン数と構築レイテンシを測る。
+
+    PYTHONPATH=$(pwd) python -m bench.history_bench --turns 60
+"""
+from __future__ import annotations
+import argparse
+import random
+import statistics
+import time
+from typing import List, Tuple
+
+from memory.history import ConversationHistory, turn_tokens
+
+_USER_LINES = [
+    "来週火曜にソファ1点を自宅前で回収してほしい",
+    "住所は大阪市北区中之島1-1-1です",
+    "電話は090-1234-5678です",
+    "やっぱり希望日は金曜日に変更できますか？",
+    "2mを超える本棚も出せますか？",
+    "午前でお願いします",
+    "名前はアイウエオ タロウです",
+]
+_ASSISTANT_LINES = [
+    "ありがとうございます。次に **ご住所（市区町村〜番地）** を教えてください。",
+    "この日付(2025-08-22)でよろしいですか？",
+    "最大辺が2mを超えるものは個別相談となります。詳しくは市の案内をご参照ください。",
+    "概算料金は1,200円です。内容をご確認ください。",
+]
+
+
+def synthetic_conversation(turns: int, seed: int = 0) -> List[Tuple[str, str]]:
+    rnd = random.Random(seed)
+    msgs: List[Tuple[str, str]] = []
+    for _ in range(turns):
+        msgs.append(("user", rnd.choice(_USER_LINES)))
+        msgs.append(("assistant", rnd.choice(_ASSISTANT_LINES)))
+    return msgs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=60)
+    ap.add_argument("--max-tokens", type=int, default=800)
+    ap.add_argument("--summary-max-tokens", type=int, default=200)
+    args = ap.parse_args()
+
+    msgs = synthetic_conversation(args.turns)
+    hist = ConversationHistory(max_tokens=args.max_tokens, summary_max_tokens=args.summary_max_tokens)
+
+    full_tokens, window_tokens, lat_ms = [], [], []
+    for i in range(2, len(msgs) + 1, 2):       # 1ターン（user+assistant）ずつ伸ばす
+        prefix = msgs[:i]
+        full_tokens.append(sum(turn_tokens(t) for t in prefix))
+        t0 = time.perf_counter()
+        w = hist.build("bench", prefix)
+        lat_ms.append((time.perf_counter() - t0) * 1000)
+        window_tokens.append(w.prompt_tokens)
+
+    print(f"turns={args.turns} budget={args.max_tokens} summary_budget={args.summary_max_tokens}")
+    print(f"history tokens (full)   : last={full_tokens[-1]} max={max(full_tokens)}")
+    print(f"history tokens (window) : last={window_tokens[-1]} max={max(window_tokens)}")
+    print(f"build latency ms        : p50={statistics.median(lat_ms):.3f} "
+          f"p95={sorted(lat_ms)[int(len(lat_ms) * 0.95) - 1]:.3f} max={max(lat_ms):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""N人の住民を同時に模擬して route() を叩き、スループットとテールレイテンシを測る。
+
+    # スタブLLMを同一プロセスで起動して計測（オフライン可）
+    PYTHONPATH=$(pwd) python -m bench.loadgen --residents 20 --with-stub --ttft-ms 300 --tps 40
+
+    # 既存のエンドポイントに対して計測（LLM_PROVIDER 等は .env に従う）
+    PYTHONPATH=$(pwd) python -m bench.loadgen --residents 5
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from .stub_llm import add_latency_args, latency_from_args, start_in_background
+
+# 住民1人分の台本。確認待ちになったら『はい』で締める
+# （日付は resolve_date が解釈できる表現にし、どの住民もレビュー→確認まで進むようにする）
+SCRIPTS: List[List[str]] = [
+    [
+        "こんにちは",
+        "火曜日にソファ1点を自宅前で回収してほしい",
+        "最大サイズはどれくらい？",
+        "住所は大阪市北区中之島1-1-1です",
+        "電話は090-1234-5678、午前希望",
+        "名前はアイウエオ タロウです",
+    ],
+    [
+        "粗大ごみの出し方は？",
+        "マットレスを2点出したい。名前はカキクケコ ハナコ",
+        "大阪市中央区本町2-3-4、電話09098765432",
+        "2025-09-05の午後、集合所でお願いします",
+    ],
+    [
+        "エアコンを処分したい",
+        "では机1点をお願いします。明後日の午前、自宅前で",
+        "サシスセソ ジロウ、大阪市西区靭本町1-2-3、08011112222",
+    ],
+]
+
+
+def _pct(vals: List[float], q: float) -> float:
+    s = sorted(vals)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))] if s else 0.0
+
+
+def _resident(idx: int, seed: int, think_ms: float) -> List[Tuple[float, str]]:
+    from orchestrator.router import route
+    from agents.garbage.schema import GarbageRequest
+
+    rnd = random.Random(seed + idx)
+    tid = f"load-{idx}"
+    req = GarbageRequest()
+    messages: List[Tuple[str, str]] = []
+    pending, review = False, ""
+    samples: List[Tuple[float, str]] = []
+
+    for utt in SCRIPTS[idx % len(SCRIPTS)] + ["はい"]:
+        if utt == "はい" and not pending:
+            break
+        t0 = time.perf_counter()
+        try:
+            out, req = route(tid, utt, req, messages=list(messages),
+                             pending_confirmation=pending, last_review_text=review)
+            kind = out.kind
+        except Exception as e:  # 計測は止めずにエラーとして数える
+            out, kind = None, f"error:{e.__class__.__name__}"
+        samples.append(((time.perf_counter() - t0) * 1000, kind))
+
+        messages.append(("user", utt))
+        if out is not None:
+            messages.append(("assistant", out.message))
+        if kind == "review":
+            if not pending:
+                review = out.message
+            pending = True
+        else:
+            pending, review = False, ""
+        if think_ms:
+            time.sleep(rnd.uniform(0.5, 1.5) * think_ms / 1000)
+    return samples
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--residents", type=int, default=10, help="同時に模擬する住民数")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="住民の発話間隔（平均, ms）")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--with-stub", action="store_true", help="スタブLLMを同一プロセスで起動して使う")
+    add_latency_args(ap)
+    args = ap.parse_args()
+
+    srv = None
+    if args.with_stub:
+        srv = start_in_background(latency=latency_from_args(args), seed=args.seed)
+        # llm_factory は import 時に LLM_PROVIDER を読むので、route を import する前に設定する
+        os.environ["LLM_PROVIDER"] = "stub"
+        os.environ["OPENAI_BASE_URL"] = srv.base_url
+
+    from orchestrator.router import stats
+    stats.reset()
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.residents) as ex:
+        results = list(ex.map(lambda i: _resident(i, args.seed, args.think_ms), range(args.residents)))
+    wall = time.perf_counter() - t0
+    if srv:
+        srv.shutdown()
+
+    lat = [ms for r in results for ms, _ in r]
+    errors = sum(1 for r in results for _, k in r if k.startswith("error"))
+    print(f"residents={args.residents} turns={len(lat)} errors={errors} wall={wall:.2f}s")
+    print(f"throughput: {len(lat) / wall:.2f} turns/s")
+    if lat:
+        print(f"latency ms: p50={statistics.median(lat):.1f} p95={_pct(lat, 0.95):.1f} "
+              f"p99={_pct(lat, 0.99):.1f} max={max(lat):.1f}")
+    print("router:", json.dumps(stats.snapshot(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
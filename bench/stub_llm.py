@@ -0,0 +1,321 @@
+"""オフライン計測用の OpenAI 互換スタブ LLM サーバー（/v1/chat/completions）。
+
+実モデルの代わりに、本プロジェクトの出力契約（[ASK]/[REVIEW] + [REQUEST_JSON]）に沿った
+台本どおりの応答を返す。ツール呼び出し・JSONモード・ストリーミング(SSE)に対応し、
+初回トークンまでの待ち時間と生成速度は分布で揺らせる。
+
+    PYTHONPATH=$(pwd) python -m bench.stub_llm --port 8765 --ttft-ms 300 --tps 40
+
+    LLM_PROVIDER=stub OPENAI_BASE_URL=http://127.0.0.1:8765/v1  # llm_factory 側の設定
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from memory.history import estimate_tokens
+from tenants.registry import registry as rulepacks
+
+_FIELDS = [
+    "name", "address", "phone", "item_description", "quantity",
+    "preferred_date", "time_slot", "pickup_location",
+]
+_ITEMS = ["ソファ", "マットレス", "机", "椅子", "本棚", "自転車", "タンス"]
+_RELATIVE_DATE = re.compile(r"(来週|再来週|今週)?[月火水木金土日]曜日?|明後日|明日|あさって")
+_CONTEXT_REQ = re.compile(r"request \(現時点の値\):\s*(\{.*?\})\s*missing:", re.DOTALL)
+_CONTEXT_TODAY = re.compile(r"today_jst:\s*(\d{4}-\d{2}-\d{2})")
+_CONTEXT_MUNICIPALITY = re.compile(r"^municipality:\s*(\S+)", re.MULTILINE)
+# エージェントが context に載せた事前計算済みの resolve_date 結果（『来週火曜』→ 2025-08-26）
+_PRECOMPUTED_DATE = re.compile(r"^- resolve_date: .*?→\s*(\d{4}-\d{2}-\d{2})", re.MULTILINE)
+
+
+# ===== 遅延モデル =====
+@dataclass
+class LatencyModel:
+    ttft_ms: float = 0.0      # 初回トークンまでの待ち（中央値）
+    ttft_jitter: float = 0.0  # 対数正規の sigma
+    tps: float = 0.0          # 生成速度（token/s, 0 なら即時）
+    tps_jitter: float = 0.0   # 対数正規の sigma
+
+    def sample_ttft(self, rnd: random.Random) -> float:
+        if self.ttft_ms <= 0:
+            return 0.0
+        return self.ttft_ms * rnd.lognormvariate(0.0, self.ttft_jitter) / 1000
+
+    def sample_per_token(self, rnd: random.Random) -> float:
+        if self.tps <= 0:
+            return 0.0
+        return 1.0 / (self.tps * rnd.lognormvariate(0.0, self.tps_jitter))
+
+
+# ===== 台本 =====
+def extract_request(text: str) -> Dict[str, Any]:
+    """発話から GarbageRequest 相当の値を正規表現で拾う（JSONモード用）。"""
+    out: Dict[str, Any] = {k: None for k in _FIELDS}
+    out["notes"] = None
+    if m := re.search(r"0\d{1,4}-?\d{1,4}-?\d{3,4}", text):
+        out["phone"] = re.sub(r"\D", "", m.group(0))
+    if m := re.search(r"([^\s、。,]+?[都道府県市区町村][^\s、。,]*?\d+(?:-\d+)+)", text):
+        out["address"] = re.sub(r"^(ご?住所は|住所:)", "", m.group(1))
+    if m := re.search(r"([ァ-ヴー]{2,}\s+[ァ-ヴー]{2,})", text):
+        out["name"] = m.group(1)
+    if m := re.search(r"(\d+)\s*(点|個|台)", text):
+        out["quantity"] = int(m.group(1))
+    if m := re.search(r"(\d{4}-\d{2}-\d{2})", text):
+        out["preferred_date"] = m.group(1)
+    for slot in ("午前", "午後"):
+        if slot in text:
+            out["time_slot"] = slot
+    for loc in ("自宅前", "集合所"):
+        if loc in text:
+            out["pickup_location"] = loc
+    for item in _ITEMS:
+        if item in text:
+            out["item_description"] = item
+            break
+    return out
+
+
+def _content(msg: Dict[str, Any]) -> str:
+    c = msg.get("content") or ""
+    if isinstance(c, list):
+        return "".join(p.get("text", "") for p in c if isinstance(p, dict))
+    return str(c)
+
+
+def _last_user(messages: List[Dict[str, Any]]) -> Tuple[int, str]:
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].get("role") == "user":
+            return i, _content(messages[i])
+    return -1, ""
+
+
+def _system_text(messages: List[Dict[str, Any]]) -> str:
+    return "\n".join(_content(m) for m in messages if m.get("role") == "system")
+
+
+def _is_json_mode(body: Dict[str, Any]) -> bool:
+    fmt = (body.get("response_format") or {}).get("type")
+    if fmt in ("json_object", "json_schema") or body.get("guided_json"):
+        return True
+    return "JSON のみ" in _system_text(body.get("messages", []))
+
+
+def _label(field: str, system: str) -> str:
+    # 項目ラベルは context の municipality のルールパックから引く（実エージェントの質問文とずれないように）
+    m = _CONTEXT_MUNICIPALITY.search(system)
+    return rulepacks.get(m.group(1) if m else None).field_label(field)
+
+
+def _plan_tool_call(body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """相対日付が含まれ、まだツール結果も事前計算結果も無ければ resolve_date を呼ぶ。"""
+    tools = {t.get("function", {}).get("name") for t in body.get("tools") or []}
+    messages = body.get("messages", [])
+    idx, user = _last_user(messages)
+    if any(m.get("role") == "tool" for m in messages[idx + 1:]):
+        return None
+    if _PRECOMPUTED_DATE.search(_system_text(messages)):
+        return None
+    if "resolve_date" in tools and (m := _RELATIVE_DATE.search(user)):
+        today = _CONTEXT_TODAY.search(_system_text(messages))
+        base_date = today.group(1) if today else time.strftime("%Y-%m-%d")
+        return {"name": "resolve_date",
+                "arguments": json.dumps({"text": m.group(0), "base_date": base_date}, ensure_ascii=False)}
+    return None
+
+
+def _contract_answer(body: Dict[str, Any]) -> str:
+    """system の {context} から現在の request を読み、不足があれば [ASK]、揃えば [REVIEW]。"""
+    messages = body.get("messages", [])
+    system = _system_text(messages)
+    req: Dict[str, Any] = {}
+    if m := _CONTEXT_REQ.search(system):
+        try:
+            req = json.loads(m.group(1))
+        except ValueError:
+            req = {}
+    _, user = _last_user(messages)
+    for k, v in extract_request(user).items():
+        if v not in (None, ""):
+            req[k] = v
+    # 事前計算または直前の resolve_date の結果を希望日として採用
+    if m := _PRECOMPUTED_DATE.search(system):
+        req["preferred_date"] = m.group(1)
+    for msg in messages:
+        if msg.get("role") == "tool" and re.fullmatch(r"\d{4}-\d{2}-\d{2}", _content(msg).strip()):
+            req["preferred_date"] = _content(msg).strip()
+
+    missing = [f for f in _FIELDS if not req.get(f)]
+    block = f"[REQUEST_JSON]\n{json.dumps(req, ensure_ascii=False)}\n[/REQUEST_JSON]"
+    if missing:
+        return f"[ASK]\nありがとうございます。次に **{_label(missing[0], system)}** を教えてください。\n{block}"
+    summary = "、".join(f"{_label(f, system).split('（')[0]}: {req[f]}" for f in _FIELDS)
+    return f"[REVIEW]\n以下の内容でよろしいですか？\n{summary}\n{block}"
+
+
+def respond(body: Dict[str, Any]) -> Dict[str, Any]:
+    """1リクエスト分の応答（message 部分）を決める。"""
+    if _is_json_mode(body):
+        _, user = _last_user(body.get("messages", []))
+        return {"role": "assistant", "content": json.dumps(extract_request(user), ensure_ascii=False)}
+    call = _plan_tool_call(body)
+    if call:
+        return {"role": "assistant", "content": None, "tool_calls": [{
+            "id": f"call_{uuid.uuid4().hex[:12]}", "type": "function", "function": call,
+        }]}
+    return {"role": "assistant", "content": _contract_answer(body)}
+
+
+# ===== HTTP =====
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubLLMServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):  # アクセスログは出さない
+        pass
+
+    def _send_json(self, code: int, payload: Dict[str, Any]):
+        data = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": self.server.model, "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+
+        rnd = self.server.rng()
+        msg = respond(body)
+        text = msg.get("content") or json.dumps(msg.get("tool_calls"), ensure_ascii=False)
+        prompt_tokens = sum(estimate_tokens(_content(m)) + 4 for m in body.get("messages", []))
+        completion_tokens = estimate_tokens(text)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        cid = f"chatcmpl-{uuid.uuid4().hex[:16]}"
+        model = body.get("model") or self.server.model
+        finish = "tool_calls" if msg.get("tool_calls") else "stop"
+
+        time.sleep(self.server.latency.sample_ttft(rnd))
+        if body.get("stream"):
+            self._stream(cid, model, msg, finish, usage, rnd)
+            return
+        time.sleep(sum(self.server.latency.sample_per_token(rnd) for _ in range(completion_tokens)))
+        self._send_json(200, {
+            "id": cid, "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": msg, "finish_reason": finish}],
+            "usage": usage,
+        })
+
+    def _stream(self, cid, model, msg, finish, usage, rnd):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta, finish_reason=None, **extra):
+            payload = {"id": cid, "object": "chat.completion.chunk", "created": int(time.time()),
+                       "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            payload.update(extra)
+            self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode())
+            self.wfile.flush()
+
+        chunk({"role": "assistant", "content": ""})
+        if msg.get("tool_calls"):
+            time.sleep(sum(self.server.latency.sample_per_token(rnd) for _ in range(usage["completion_tokens"])))
+            chunk({"tool_calls": [dict(tc, index=i) for i, tc in enumerate(msg["tool_calls"])]})
+        else:
+            # 4文字ずつ区切って送る（日本語はおおむね1文字=1トークン）
+            content = msg["content"]
+            for i in range(0, len(content), 4):
+                piece = content[i:i + 4]
+                time.sleep(sum(self.server.latency.sample_per_token(rnd) for _ in range(estimate_tokens(piece))))
+                chunk({"content": piece})
+        chunk({}, finish, usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr: Tuple[str, int], latency: Optional[LatencyModel] = None,
+                 model: str = "stub-model", seed: Optional[int] = None):
+        super().__init__(addr, _Handler)
+        self.latency = latency or LatencyModel()
+        self.model = model
+        self._seed = random.Random(seed)
+        self._seed_lock = threading.Lock()
+
+    def rng(self) -> random.Random:
+        # リクエスト毎に独立した乱数列（スレッド間で共有しない）
+        with self._seed_lock:
+            return random.Random(self._seed.random())
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_in_background(host: str = "127.0.0.1", port: int = 0, **kwargs) -> StubLLMServer:
+    """別スレッドでサーバーを起動して返す（port=0 なら空きポート）。止めるときは shutdown()。"""
+    srv = StubLLMServer((host, port), **kwargs)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def add_latency_args(ap: argparse.ArgumentParser):
+    ap.add_argument("--ttft-ms", type=float, default=0.0, help="初回トークンまでの待ち（中央値, ms）")
+    ap.add_argument("--ttft-jitter", type=float, default=0.0, help="ttft の対数正規 sigma")
+    ap.add_argument("--tps", type=float, default=0.0, help="生成速度 token/s（0 なら即時）")
+    ap.add_argument("--tps-jitter", type=float, default=0.0, help="tps の対数正規 sigma")
+
+
+def latency_from_args(args) -> LatencyModel:
+    return LatencyModel(ttft_ms=args.ttft_ms, ttft_jitter=args.ttft_jitter,
+                        tps=args.tps, tps_jitter=args.tps_jitter)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--seed", type=int, default=None)
+    add_latency_args(ap)
+    args = ap.parse_args()
+
+    srv = StubLLMServer((args.host, args.port), latency=latency_from_args(args), seed=args.seed)
+    print(f"stub LLM listening on {srv.base_url}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
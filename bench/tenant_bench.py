@@ -0,0 +1,92 @@
+"""自治体（ルールパック）数を増やしたときのメモリ・参照コスト・再読込コストを測る。
+
+    PYTHONPATH=$(pwd) python -m bench.tenant_bench --counts 10 100 300 500
+"""
+from __future__ import annotations
+import argparse
+import datetime as _dt
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from tenants.registry import RulePackRegistry
+
+_ITEMS = ["ソファ", "マットレス", "机", "椅子", "本棚", "自転車", "タンス", "ベッド", "食器棚", "ストーブ"]
+_AREAS = ["北区", "中央区", "西区", "東区", "南区", "港区"]
+
+
+def synthetic_pack(i: int, rnd: random.Random, catalog_size: int) -> dict:
+    items = {f"{rnd.choice(_ITEMS)}{n}": rnd.randrange(200, 3000, 100) for n in range(catalog_size)}
+    return {
+        "id": f"city{i:04d}",
+        "name": f"サンプル市{i}",
+        "catalog": {"default_price": 500, "items": items},
+        "schedule": {
+            "closed_weekdays": [6],
+            "closed_dates": ["01-01", "12-31", f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"],
+            "area_weekdays": {a: rnd.sample(range(6), 2) for a in rnd.sample(_AREAS, 3)},
+        },
+        "faq": {"entries": [
+            {"keywords": ["サイズ", "大きさ"], "answer": f"サンプル市{i}: 最大辺2mまで"},
+            {"keywords": ["支払", "手数料"], "answer": f"サンプル市{i}: 処理券で支払い"},
+        ]},
+        "prompt": {"notes": [f"サンプル市{i}では収集前日の17時まで受付"]},
+    }
+
+
+def bench(count: int, catalog_size: int, lookups: int, seed: int):
+    rnd = random.Random(seed)
+    with tempfile.TemporaryDirectory() as d:
+        for i in range(count):
+            with open(os.path.join(d, f"city{i:04d}.json"), "w", encoding="utf-8") as f:
+                json.dump(synthetic_pack(i, rnd, catalog_size), f, ensure_ascii=False)
+
+        tracemalloc.start()
+        base = tracemalloc.take_snapshot()
+        t0 = time.perf_counter()
+        reg = RulePackRegistry(pack_dir=d, default_id="city0000", check_interval=0.0)
+        load_s = time.perf_counter() - t0
+        mem = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(base, "filename"))
+        tracemalloc.stop()
+
+        ids = reg.ids()
+        day = _dt.date(2025, 8, 20)
+        queries = [(rnd.choice(ids), f"{rnd.choice(_ITEMS)}{rnd.randrange(catalog_size)}",
+                    day + _dt.timedelta(days=rnd.randrange(60)), f"大阪市{rnd.choice(_AREAS)}1-1-1")
+                   for _ in range(lookups)]
+        t0 = time.perf_counter()
+        for pid, item, dd, addr in queries:
+            pack = reg.get(pid)
+            pack.price(item)
+            pack.check_collectible(dd, addr)
+            pack.faq("手数料の支払い方法は？")
+        lookup_us = (time.perf_counter() - t0) / lookups * 1e6
+
+        # 1ファイルだけ更新して差分再読込
+        path = os.path.join(d, "city0000.json")
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        t0 = time.perf_counter()
+        changed = reg.reload()
+        reload_ms = (time.perf_counter() - t0) * 1000
+
+    print(f"tenants={count:5d} load={load_s * 1000:8.1f}ms mem={mem / 1024:9.1f}KiB "
+          f"({mem / count / 1024:6.1f}KiB/tenant) lookup={lookup_us:6.2f}us/turn "
+          f"reload(1 changed)={reload_ms:6.1f}ms changed={changed}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--counts", type=int, nargs="+", default=[10, 100, 300, 500])
+    ap.add_argument("--catalog-size", type=int, default=200, help="1自治体あたりの品目数")
+    ap.add_argument("--lookups", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    for n in args.counts:
+        bench(n, args.catalog_size, args.lookups, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# 会話履歴の窓管理：直近ターンはトークン予算内でそのまま残し、
+# 窓から外れた古いターンは要約に畳み込む（スレッド単位でキャッシュ）
+
+Turn = Tuple[str, str]                     # (role, content)
+Summarizer = Callable[[str, Sequence[Turn]], str]
+
+_ASCII_WORD = re.compile(r"[A-Za-z0-9_]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算。日本語は1文字≒1トークン、英数字は4文字≒1トークンで数える。"""
+    if not text:
+        return 0
+    ascii_chars = sum(len(w) for w in _ASCII_WORD.findall(text))
+    other = len(text) - ascii_chars - text.count(" ")
+    return max(1, other + (ascii_chars + 3) // 4)
+
+
+def turn_tokens(turn: Turn) -> int:
+    # role 名とメッセージ区切りのオーバーヘッドとして +4
+    return estimate_tokens(turn[1]) + 4
+
+
+def extractive_summarizer(max_chars_per_turn: int = 60) -> Summarizer:
+    """LLMを使わない要約器。ユーザー発話の要点（先頭部分）を既存要約に追記する。"""
+    def _summarize(prev: str, turns: Sequence[Turn]) -> str:
+        lines = [prev] if prev else []
+        for role, content in turns:
+            if role != "user":
+                continue
+            text = " ".join((content or "").split())
+            if len(text) > max_chars_per_turn:
+                text = text[:max_chars_per_turn] + "…"
+            lines.append(f"- {text}")
+        return "\n".join(lines)
+    return _summarize
+
+
+def llm_summarizer(llm) -> Summarizer:
+    """LLMで既存要約＋外れたターンを要約し直す要約器。"""
+    from agents.common.callbacks import turn_callbacks
+    from agents.garbage.prompts import history_summary_prompt
+
+    chain = history_summary_prompt | llm
+
+    def _summarize(prev: str, turns: Sequence[Turn]) -> str:
+        dialog = "\n".join(f"{role}: {content}" for role, content in turns)
+        # ルーターの count_llm_calls() 内で呼ばれたときはターンの LLM 呼び出しとして数える
+        out = chain.invoke({"summary": prev or "(なし)", "dialog": dialog},
+                           config={"callbacks": turn_callbacks()})
+        return str(getattr(out, "content", out)).strip()
+    return _summarize
+
+
+@dataclass
+class HistoryWindow:
+    summary: str = ""
+    recent: List[Turn] = field(default_factory=list)
+    prompt_tokens: int = 0
+
+
+@dataclass
+class _SummaryState:
+    upto: int = 0          # messages[:upto] は要約済み
+    summary: str = ""
+
+
+class ConversationHistory:
+    """スレッド毎の履歴窓と増分要約を管理する。
+
+    - 直近ターンを `max_tokens - summary_max_tokens` 以内で新しい順に残す（最低 `min_recent_turns` ターン）
+    - 窓から外れたターンだけを要約器に渡し、既存要約に畳み込む（再計算しない）
+    - 要約は `summary_max_tokens` を超えたら古い行から切り詰める（1行でも文字単位で削る）
+    - 要約器はロックの外で呼ぶ（LLM 要約の往復中も他スレッドのターンを止めない）
+    - 要約キャッシュは最大 `max_threads` スレッド分。超えたら最も長く使われていないスレッドから捨てる
+      （捨てたスレッドが戻ってきた場合は要約を作り直す）
+    """
+
+    def __init__(self, max_tokens: int = 800, summary_max_tokens: int = 200,
+                 min_recent_turns: int = 2, summarizer: Optional[Summarizer] = None,
+                 max_threads: int = 1000):
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.min_recent_turns = min_recent_turns
+        self.summarizer = summarizer or extractive_summarizer()
+        self.max_threads = max_threads
+        self._states: OrderedDict[str, _SummaryState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reset(self, thread_id: str):
+        with self._lock:
+            self._states.pop(thread_id, None)
+
+    def build(self, thread_id: str, messages: Sequence[Turn]) -> HistoryWindow:
+        with self._lock:
+            state = self._states.setdefault(thread_id, _SummaryState())
+            self._states.move_to_end(thread_id)
+            while len(self._states) > self.max_threads:
+                self._states.popitem(last=False)
+            # スレッドが作り直された等で履歴が短くなった場合は要約をやり直す
+            if len(messages) < state.upto:
+                state = self._states[thread_id] = _SummaryState()
+            upto, summary = state.upto, state.summary
+
+        # 要約ぶんの予算は先に確保しておく（要約が伸びても合計が max_tokens を超えない）
+        budget = self.max_tokens - self.summary_max_tokens
+        start = len(messages)
+        used = 0
+        while start > upto:
+            cost = turn_tokens(messages[start - 1])
+            kept = len(messages) - start
+            if used + cost > budget and kept >= self.min_recent_turns:
+                break
+            used += cost
+            start -= 1
+
+        if start > upto:
+            # 要約器（LLM の場合は往復1回）はロックの外で呼び、他スレッドのターンを待たせない
+            summary = self._clip(self.summarizer(summary, list(messages[upto:start])))
+            with self._lock:
+                # 同じスレッドの別ターンが先に進めていなければ結果を反映する
+                if self._states.get(thread_id) is state and state.upto == upto:
+                    state.summary, state.upto = summary, start
+
+        recent = list(messages[start:])
+        tokens = estimate_tokens(summary) + sum(turn_tokens(t) for t in recent)
+        return HistoryWindow(summary=summary, recent=recent, prompt_tokens=tokens)
+
+    def _clip(self, summary: str) -> str:
+        """古い行から落とし、それでも収まらなければ残った行の先頭側を文字単位で削る。"""
+        lines = summary.splitlines()
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        text = "\n".join(lines)
+        if estimate_tokens(text) > self.summary_max_tokens:
+            # 1文字は1トークン以下で数えるので、末尾 (上限-1) 文字＋『…』なら必ず収まる
+            text = "…" + text[len(text) - max(0, self.summary_max_tokens - 1):]
+        return text
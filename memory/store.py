@@ -10,8 +10,9 @@ class InMemoryStore:
     def list_thread_ids(self):
         return list(self._threads.keys())
 
-    def create_thread(self, thread_id: str):
+    def create_thread(self, thread_id: str, municipality: str = "default"):
         self._threads[thread_id] = {
+            "municipality": municipality,
             "messages": [],
             "request": GarbageRequest(),
             "pending_confirmation": False,
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from agents.garbage.schema import AgentInput, AgentOutput, AgentAsk, AgentAnswer, AgentReview
+from agents.garbage import agent as garbage_agent
+from agents.garbage.agent import missing_fields, pick_next_field, make_question_for
+from agents.common.tools import rag_search, reserve
+from tenants.registry import current_pack
+
+from .intent import AFFIRM, NEG, CONFIRM, FAQ, GREETING, THANKS, OTHER_SERVICE, SLOT_FILLING
+from .registry import register
+
+# 組み込みハンドラ。slot_filling 以外は LLM を呼ばない。
+
+register(SLOT_FILLING, uses_llm=True)(garbage_agent.run)
+
+
+def _back_to_slots(ainput: AgentInput, lead: str) -> AgentOutput:
+    """先頭メッセージの後ろに、次に聞く1項目の質問を付けて申込収集に戻る。"""
+    miss = missing_fields(ainput.request)
+    if not miss:
+        return AgentAnswer(message=lead, request=ainput.request)
+    next_f = pick_next_field(miss)
+    return AgentAsk(
+        message=f"{lead}\n\n{make_question_for(next_f)}",
+        missing=miss, next_field=next_f, request=ainput.request,
+    )
+
+
+@register(FAQ, uses_llm=False)
+def answer_faq(ainput: AgentInput) -> AgentOutput:
+    return _back_to_slots(ainput, rag_search.invoke({"query": ainput.user_utterance}))
+
+
+@register(GREETING, uses_llm=False)
+def answer_greeting(ainput: AgentInput) -> AgentOutput:
+    return _back_to_slots(ainput, f"こんにちは。{current_pack().name}の粗大ごみ収集のお申込みを承ります。")
+
+
+@register(THANKS, uses_llm=False)
+def answer_thanks(ainput: AgentInput) -> AgentOutput:
+    # 予約完了後（不足なし）は締めの挨拶のみ。申込途中なら次の項目を続けて聞く
+    return _back_to_slots(ainput, "ご利用ありがとうございました。ほかにご用件があればお知らせください。")
+
+
+@register(OTHER_SERVICE, uses_llm=False)
+def answer_other_service(ainput: AgentInput) -> AgentOutput:
+    lead = (
+        "申し訳ありません。こちらは粗大ごみ収集の受付窓口です。"
+        "家電リサイクル対象品（エアコン・テレビ・冷蔵庫・洗濯機）、パソコン、"
+        "引越し・不用品買取のご相談は、市の該当窓口または販売店へお問い合わせください。"
+    )
+    return _back_to_slots(ainput, lead)
+
+
+@register(CONFIRM, uses_llm=False)
+def handle_confirmation(ainput: AgentInput) -> AgentOutput:
+    """レビュー提示後の『はい/いいえ』を処理する。はい→予約実行、いいえ→修正受付、それ以外→再確認。"""
+    text = ainput.user_utterance.strip()
+    if AFFIRM.match(text):
+        c = reserve.invoke({"req_json": ainput.request.model_dump()})
+        msg = (
+            "【✅ 予約完了】\n"
+            f"  受付番号：{c['confirmation_id']}\n"
+            f"  回収日　：{c['date']}（{c['time_slot']}）\n"
+            f"  回収物　：{c['item']} × {c['quantity']}点\n"
+            f"  回収場所：{c['pickup_location']}（{c['address']}）\n"
+            f"  申込者　：{c['applicant']}（連絡先：{c['contact']}）\n"
+        )
+        return AgentAnswer(message=msg, request=ainput.request)
+    if NEG.match(text):
+        msg = "どの項目を修正しますか？ 例：「希望日を2025-08-19に」「回収場所は集合所に」"
+        return AgentAnswer(message=msg, request=ainput.request)
+    reprompt = ainput.last_review_text + "\n"
+    reprompt += "すみません、『はい』または『いいえ』でご回答ください。"
+    return AgentReview(message=reprompt, request=ainput.request)
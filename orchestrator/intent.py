@@ -0,0 +1,137 @@
+from __future__ import annotations
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict
+
+# LLMを使わない軽量な意図分類（キーワード＋文字bigram）
+# 迷ったら slot_filling（＝フルのエージェント）に倒す
+
+CONFIRM = "confirm"
+FAQ = "faq"
+GREETING = "greeting"
+THANKS = "thanks"
+OTHER_SERVICE = "other_service"
+SLOT_FILLING = "slot_filling"
+
+# 判定（正規表現→曖昧は LLM フォールバックでもよいが、ここでは軽量に）
+AFFIRM = re.compile(r"^(はい|OK|オーケー|承認|問題ない|大丈夫|了解|お願いします|実行|yes|ok)$", re.IGNORECASE)
+NEG    = re.compile(r"^(いいえ|NO|だめ|修正|変更|やめる|保留|キャンセル|cancel)$", re.IGNORECASE)
+
+_KEYWORDS: Dict[str, Dict[str, float]] = {
+    FAQ: {
+        "サイズ": 2, "大きさ": 2, "ルール": 2, "出し方": 2, "分別": 2, "シール": 2,
+        "手数料": 1.5, "支払": 1.5, "何時まで": 1.5, "どうすれば": 1, "方法": 1, "とは": 1,
+    },
+    GREETING: {
+        "こんにちは": 3, "こんばんは": 3, "おはよう": 3, "はじめまして": 3, "よろしく": 1,
+    },
+    THANKS: {
+        "ありがとう": 3, "お世話になりました": 3, "助かりました": 3,
+    },
+    OTHER_SERVICE: {
+        "引越": 3, "引っ越": 3, "買取": 3, "買い取": 3, "家電リサイクル": 3, "不用品": 2,
+    },
+    SLOT_FILLING: {
+        "回収": 1.5, "申込": 1.5, "申し込": 1.5, "予約": 1.5, "住所": 2, "電話": 2, "名前": 2,
+        "午前": 2, "午後": 2, "自宅前": 2, "集合所": 2, "来週": 2, "明日": 2, "明後日": 2,
+        "曜": 1, "個": 1, "点": 0.5,
+    },
+}
+
+_EXAMPLES: Dict[str, list[str]] = {
+    FAQ: [
+        "最大サイズはどれくらいまで出せますか",
+        "粗大ごみの出し方を教えてください",
+        "手数料の支払い方法は？",
+        "処理券のシールはどこで買えますか",
+    ],
+    GREETING: [
+        "こんにちは", "よろしくお願いします",
+    ],
+    THANKS: [
+        "ありがとうございました", "助かりました",
+    ],
+    OTHER_SERVICE: [
+        "引っ越しの手続きをしたい", "エアコンを処分したい", "不用品を買い取ってほしい",
+        "テレビや冷蔵庫は出せますか",
+    ],
+    SLOT_FILLING: [
+        "来週火曜にソファ1点を自宅前で回収してほしい",
+        "住所は大阪市北区中之島1-1-1です",
+        "電話は09012345678",
+        "午前でお願いします",
+    ],
+}
+
+# 家電リサイクル法の対象品など（粗大ごみでは出せない）。ただし『テレビ台』『洗濯機ラック』のような
+# 家具は粗大ごみなので、直後に家具を表す語が続く場合は数えない
+_APPLIANCE = re.compile(r"(エアコン|テレビ|冷蔵庫|洗濯機|パソコン)(?!台|ラック|棚|デスク|カバー|ボード)")
+# 粗大ごみになる品目語。発話に含まれていれば申込情報とみなし、他サービスには振らない
+# （『冷蔵庫の横の棚』『こんにちは、マットレスを出したい』など）
+_BULKY_ITEM = re.compile(r"ラック|棚|デスク|カバー|ボード|ソファ|机|椅子|マットレス|タンス|ベッド|自転車|家具")
+
+# 数字（電話・住所・日付・個数）やカタカナ氏名は申込情報とみなす
+_SLOT_PATTERN = re.compile(r"\d|[ァ-ヴー]{2,}\s+[ァ-ヴー]{2,}")
+
+THRESHOLD = 2.0        # これ未満はどの意図とも言い切れない
+SLOT_OVERRIDE = 1.5    # 申込情報らしさがこれ以上ならフルのエージェントへ
+
+
+def _bigrams(text: str) -> Counter:
+    t = re.sub(r"\s+", "", text.lower())
+    return Counter(t[i:i + 2] for i in range(len(t) - 1)) if len(t) > 1 else Counter([t])
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    dot = sum(v * b.get(k, 0) for k, v in a.items())
+    if not dot:
+        return 0.0
+    na = math.sqrt(sum(v * v for v in a.values()))
+    nb = math.sqrt(sum(v * v for v in b.values()))
+    return dot / (na * nb)
+
+
+# 例文のbigramベクトルは読み込み時に一度だけ作る
+_EXAMPLE_VECS: Dict[str, list[Counter]] = {k: [_bigrams(e) for e in v] for k, v in _EXAMPLES.items()}
+
+
+@dataclass(frozen=True)
+class IntentResult:
+    name: str
+    score: float
+
+
+def scores(utterance: str) -> Dict[str, float]:
+    text = utterance.strip()
+    vec = _bigrams(text)
+    out: Dict[str, float] = {}
+    for intent, kws in _KEYWORDS.items():
+        s = sum(w for kw, w in kws.items() if kw in text)
+        s += 2.0 * max((_cosine(vec, e) for e in _EXAMPLE_VECS[intent]), default=0.0)
+        out[intent] = s
+    out[OTHER_SERVICE] += 3.0 * len(set(_APPLIANCE.findall(text)))
+    if _BULKY_ITEM.search(text):
+        out[OTHER_SERVICE] = 0.0
+        out[SLOT_FILLING] += SLOT_OVERRIDE
+    if _SLOT_PATTERN.search(text):
+        out[SLOT_FILLING] += 2.0
+    return out
+
+
+def classify(utterance: str, pending_confirmation: bool = False) -> IntentResult:
+    """発話の意図を分類する。確認待ち中は常に confirm。"""
+    text = (utterance or "").strip()
+    if pending_confirmation:
+        return IntentResult(CONFIRM, 1.0)
+    if not text:
+        return IntentResult(SLOT_FILLING, 0.0)
+    s = scores(text)
+    best = max(s, key=s.get)
+    # 申込情報を含む発話はフルのエージェントへ（FAQ等との混在も含む）
+    if best != SLOT_FILLING and s[SLOT_FILLING] >= SLOT_OVERRIDE:
+        return IntentResult(SLOT_FILLING, s[SLOT_FILLING])
+    if s[best] < THRESHOLD:
+        return IntentResult(SLOT_FILLING, s[best])
+    return IntentResult(best, s[best])
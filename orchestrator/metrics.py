@@ -0,0 +1,64 @@
+from __future__ import annotations
+import threading
+from collections import defaultdict, deque
+from functools import partial
+from typing import Any, Deque, Dict, List
+
+
+def _pct(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[i]
+
+
+class RouterStats:
+    """ルーターの意図別レイテンシ・LLM呼び出し回数と、LLMを使わずに処理できたターンの割合を集計する。
+
+    レイテンシ（p50/p95/max）は意図ごとに直近 `max_samples` 件から求める（長時間動かしてもメモリが増え続けない）。
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self._lat: Dict[str, Deque[float]] = defaultdict(partial(deque, maxlen=max_samples))
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._calls: Dict[str, int] = defaultdict(int)
+        self._turns = 0
+        self._no_llm = 0
+        self._lock = threading.Lock()
+
+    def record(self, intent: str, latency_ms: float, used_llm: bool, llm_calls: int = 0):
+        with self._lock:
+            self._lat[intent].append(latency_ms)
+            self._counts[intent] += 1
+            self._calls[intent] += llm_calls
+            self._turns += 1
+            if not used_llm:
+                self._no_llm += 1
+
+    def reset(self):
+        with self._lock:
+            self._lat.clear()
+            self._counts.clear()
+            self._calls.clear()
+            self._turns = 0
+            self._no_llm = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            per_intent = {}
+            for intent, vals in self._lat.items():
+                s = sorted(vals)
+                n = self._counts[intent]
+                per_intent[intent] = {
+                    "count": n,
+                    "p50_ms": _pct(s, 0.50),
+                    "p95_ms": _pct(s, 0.95),
+                    "max_ms": s[-1],
+                    "llm_calls_per_turn": self._calls[intent] / n,
+                }
+            return {
+                "turns": self._turns,
+                "no_llm_share": (self._no_llm / self._turns) if self._turns else 0.0,
+                "intents": per_intent,
+            }
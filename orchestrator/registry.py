@@ -0,0 +1,37 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from agents.garbage.schema import AgentInput, AgentOutput
+
+Handler = Callable[[AgentInput], AgentOutput]
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    intent: str
+    handler: Handler
+    uses_llm: bool = True
+
+
+_REGISTRY: Dict[str, AgentSpec] = {}
+
+
+def register(intent: str, uses_llm: bool = True):
+    """意図ごとのハンドラを登録するデコレータ。同じ意図を再登録すると差し替える。
+
+        @register("faq", uses_llm=False)
+        def answer_faq(ainput: AgentInput) -> AgentOutput: ...
+    """
+    def _wrap(fn: Handler) -> Handler:
+        _REGISTRY[intent] = AgentSpec(intent=intent, handler=fn, uses_llm=uses_llm)
+        return fn
+    return _wrap
+
+
+def get(intent: str) -> AgentSpec:
+    return _REGISTRY[intent]
+
+
+def registered() -> List[str]:
+    return list(_REGISTRY.keys())
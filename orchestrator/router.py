@@ -1,24 +1,77 @@
 from __future__ import annotations
-from typing import Tuple
+import os
+import time
+from typing import Optional, Sequence, Tuple
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+from agents.common.callbacks import count_llm_calls
 from agents.garbage.schema import AgentInput, AgentOutput, GarbageRequest
-from agents.garbage import agent as garbage_agent
+from memory.history import ConversationHistory, llm_summarizer
+from tenants.registry import registry as rulepacks, activate
+
+from . import handlers  # noqa: F401  組み込みハンドラを registry に登録する
+from . import registry
+from .intent import classify
+from .metrics import RouterStats
 
 JST = ZoneInfo("Asia/Tokyo")
 
-def route(thread_id: str, user_utterance: str, current_request: GarbageRequest) -> Tuple[AgentOutput, GarbageRequest]:
-    """今は常に GarbageAgent に委譲。将来ここでルーティング。"""
+def _make_history() -> ConversationHistory:
+    """HISTORY_SUMMARIZER=llm なら古いターンを LLM で要約する（既定は LLM を使わない抜粋要約）。"""
+    max_threads = int(os.getenv("HISTORY_MAX_THREADS", "1000"))
+    if os.getenv("HISTORY_SUMMARIZER", "extractive").lower() == "llm":
+        from agents.common.llm_factory import get_llm
+        return ConversationHistory(summarizer=llm_summarizer(get_llm(temperature=0.0)),
+                                   max_threads=max_threads)
+    return ConversationHistory(max_threads=max_threads)
+
+
+# スレッド毎の履歴窓＋要約キャッシュ（プロセス内で共有）
+history = _make_history()
+# 意図別レイテンシ・LLM呼び出し回数 / LLMを使わずに処理できたターンの割合
+stats = RouterStats()
+
+def route(thread_id: str, user_utterance: str, current_request: GarbageRequest,
+          messages: Optional[Sequence[Tuple[str, str]]] = None,
+          pending_confirmation: bool = False,
+          last_review_text: str = "",
+          municipality: Optional[str] = None) -> Tuple[AgentOutput, GarbageRequest]:
+    """発話の意図を軽量に分類し、registry に登録されたハンドラへ振り分ける。
+
+    messages: 今回の発話より前の会話 (role, content)。トークン予算内の直近ターンと
+    古いターンの要約に圧縮してエージェントに渡す。
+    pending_confirmation / last_review_text: レビュー提示後の確認待ち状態。
+    municipality: スレッドの自治体（ルールパックID）。未指定・未登録なら既定のパック。
+    """
+    t0 = time.perf_counter()
+    intent = classify(user_utterance, pending_confirmation=pending_confirmation)
+    spec = registry.get(intent.name)
+
+    # 更新されたルールパックがあれば差し替える（ワーカー再起動は不要）。
+    # このターンは取得したパックを使い続ける
+    rulepacks.maybe_reload()
+    pack = rulepacks.get(municipality)
+
     today_iso = datetime.now(JST).date().isoformat()
     ainput = AgentInput(
         thread_id=thread_id,
+        municipality=pack.id,
         user_utterance=user_utterance,
         context_today_iso=today_iso,
         request=current_request,
+        pending_confirmation=pending_confirmation,
+        last_review_text=last_review_text,
     )
-    out = garbage_agent.run(ainput)
+    with activate(pack), count_llm_calls() as calls:
+        # 履歴窓（LLM 要約の場合は LLM を呼ぶ）は履歴を使うハンドラのときだけ作り、呼び出し回数にも数える
+        if spec.uses_llm:
+            window = history.build(thread_id, messages or [])
+            ainput.history, ainput.history_summary = window.recent, window.summary
+        out = spec.handler(ainput)
+    stats.record(intent.name, (time.perf_counter() - t0) * 1000,
+                 used_llm=calls.calls > 0, llm_calls=calls.calls)
 
     if hasattr(out, "request") and out.request:
         return out, out.request
-    return out, current_request
\ No newline at end of file
+    return out, current_request
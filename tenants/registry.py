@@ -0,0 +1,134 @@
+from __future__ import annotations
+import contextvars
+import glob
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+from .rulepack import RulePack, RulePackError, load_pack_file
+
+logger = logging.getLogger(__name__)
+
+PACK_DIR = os.getenv("RULEPACK_DIR") or os.path.join(os.path.dirname(__file__), "packs")
+DEFAULT_MUNICIPALITY = os.getenv("DEFAULT_MUNICIPALITY", "default")
+
+
+class RulePackRegistry:
+    """ディレクトリ内の *.json を自治体ごとのルールパックとして保持する。
+
+    - 読み取りはロック不要：不変の RulePack を並べた読み取り専用 Mapping を1つ参照するだけ
+    - reload() は変更されたファイルだけをコンパイルし、新しい Mapping を作って参照ごと差し替える
+      （コンパイルに失敗したパックは旧版を使い続ける。既定パックはファイルが消えても最後の版を保持する）
+    - 変更検知は (st_mtime_ns, st_size)。同じタイムスタンプ内の書き換えもサイズが変われば拾う
+    - 同じ id を宣言するファイルが複数あれば、先に読み込んでいた方を使い、後から来た方は拒否する
+      （使っている方が消えたら残った方に切り替わる）
+    """
+
+    def __init__(self, pack_dir: str = PACK_DIR, default_id: str = DEFAULT_MUNICIPALITY,
+                 check_interval: float = 5.0):
+        self.pack_dir = pack_dir
+        self.default_id = default_id
+        self.check_interval = check_interval
+        self._packs: Mapping[str, RulePack] = MappingProxyType({})
+        self._compiled: Dict[str, Tuple[Tuple[int, int], RulePack]] = {}   # path -> ((mtime_ns, size), pack)
+        self._owners: Dict[str, str] = {}                                 # pack_id -> 採用しているファイル
+        self._rejected: Set[str] = set()                                  # id 重複で拒否中のファイル
+        self._reload_lock = threading.Lock()
+        self._next_check = 0.0
+        self.reload()
+
+    def get(self, pack_id: Optional[str] = None) -> RulePack:
+        packs = self._packs
+        pack = packs.get(pack_id or self.default_id)
+        if pack is None:
+            if pack_id:
+                logger.warning("未登録の自治体のため既定のルールパックを使います: %s", pack_id)
+            pack = packs.get(self.default_id)
+        if pack is None:
+            raise KeyError(f"ルールパックがありません: {pack_id or self.default_id}")
+        return pack
+
+    def ids(self) -> List[str]:
+        return sorted(self._packs)
+
+    def reload(self) -> List[str]:
+        """変更・追加・削除されたパックを反映し、変わった pack_id を返す。"""
+        with self._reload_lock:
+            self._next_check = time.monotonic() + self.check_interval
+            compiled = dict(self._compiled)
+            seen = set()
+            for path in sorted(glob.glob(os.path.join(self.pack_dir, "*.json"))):
+                seen.add(path)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                sig = (st.st_mtime_ns, st.st_size)
+                if path in compiled and compiled[path][0] == sig:
+                    continue
+                try:
+                    compiled[path] = (sig, load_pack_file(path))
+                except (OSError, RulePackError) as e:
+                    logger.warning("ルールパックの読み込みに失敗（旧版を継続）: %s", e)
+            for path in set(compiled) - seen:
+                del compiled[path]
+
+            # id ごとに採用するファイルを決める（既に採用中のファイルを優先し、無ければファイル名順で先頭）
+            by_id: Dict[str, List[str]] = {}
+            for path in sorted(compiled):
+                by_id.setdefault(compiled[path][1].id, []).append(path)
+            old = self._packs
+            packs: Dict[str, RulePack] = {}
+            owners: Dict[str, str] = {}
+            rejected: Set[str] = set()
+            for pack_id, paths in by_id.items():
+                owner = self._owners.get(pack_id)
+                if owner not in paths:
+                    owner = paths[0]
+                owners[pack_id] = owner
+                packs[pack_id] = compiled[owner][1]
+                for path in paths:
+                    if path != owner:
+                        rejected.add(path)
+                        if path not in self._rejected:
+                            logger.warning("id『%s』は %s で定義済みのため拒否します: %s", pack_id, owner, path)
+            if self.default_id not in packs and self.default_id in old:
+                if self.default_id in self._owners:
+                    logger.warning("既定のルールパックのファイルが見つかりません（最後の版を継続）: %s",
+                                   self._owners[self.default_id])
+                packs[self.default_id] = old[self.default_id]
+
+            changed = sorted(i for i in set(old) | set(packs) if old.get(i) is not packs.get(i))
+            if changed:
+                self._packs = MappingProxyType(packs)   # 参照の差し替え（アトミック）
+            self._compiled, self._owners, self._rejected = compiled, owners, rejected
+            return changed
+
+    def maybe_reload(self) -> List[str]:
+        """check_interval ごとに reload()。他スレッドが再読込中なら待たずに戻る。"""
+        if time.monotonic() < self._next_check or self._reload_lock.locked():
+            return []
+        return self.reload()
+
+
+registry = RulePackRegistry()
+
+_active: contextvars.ContextVar[RulePack | None] = contextvars.ContextVar("active_rulepack", default=None)
+
+
+@contextmanager
+def activate(pack: RulePack) -> Iterator[RulePack]:
+    """with ブロック内のツール/エージェントが参照するルールパックを固定する。"""
+    token = _active.set(pack)
+    try:
+        yield pack
+    finally:
+        _active.reset(token)
+
+
+def current_pack() -> RulePack:
+    return _active.get() or registry.get()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import datetime as _dt
+import json
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, FrozenSet, Mapping, Tuple
+
+# 自治体ごとのルールパック（品目・料金、収集日ルール、FAQ、プロンプト差分、項目ラベル）
+# 読み込み時に不変の参照構造へコンパイルし、ターン中は辞書/集合の参照だけで判定する
+
+_WEEKDAY_JA = "月火水木金土日"
+
+
+class RulePackError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class RulePack:
+    id: str
+    name: str
+    default_price: int
+    prices: Mapping[str, int]
+    closed_weekdays: FrozenSet[int]
+    closed_month_days: FrozenSet[Tuple[int, int]]
+    closed_iso_dates: FrozenSet[str]
+    area_weekdays: Tuple[Tuple[str, FrozenSet[int]], ...]   # 長い地名から順に照合
+    faq_entries: Tuple[Tuple[Tuple[str, ...], str], ...]
+    faq_default: str
+    prompt_rules: str                                      # agent_system の {municipality_rules}
+    field_labels: Mapping[str, str]
+    field_examples: Mapping[str, str]
+
+    def price(self, item: str) -> int:
+        return self.prices.get(item, self.default_price)
+
+    def check_collectible(self, d: _dt.date, address: str = "") -> str:
+        if d.weekday() in self.closed_weekdays:
+            return f"ng: {_WEEKDAY_JA[d.weekday()]}曜日は回収不可です"
+        if (d.month, d.day) in self.closed_month_days or d.isoformat() in self.closed_iso_dates:
+            return "ng: 祝日/年末年始は回収不可です"
+        for area, days in self.area_weekdays:
+            if area in (address or ""):
+                if d.weekday() not in days:
+                    allowed = "・".join(_WEEKDAY_JA[w] for w in sorted(days))
+                    return f"ng: {area}の収集日は{allowed}曜日です"
+                break
+        return "ok"
+
+    def faq(self, query: str) -> str:
+        for keywords, answer in self.faq_entries:
+            if any(k in query for k in keywords):
+                return answer
+        return self.faq_default
+
+    def field_label(self, field: str) -> str:
+        return self.field_labels.get(field, field)
+
+    def field_example(self, field: str) -> str:
+        return self.field_examples.get(field, "")
+
+
+def _weekdays(values, where: str) -> FrozenSet[int]:
+    out = set()
+    for v in values:
+        if isinstance(v, str) and v[:1] in _WEEKDAY_JA and v[1:] in ("", "曜", "曜日"):
+            v = _WEEKDAY_JA.index(v[:1])
+        if not isinstance(v, int) or not 0 <= v <= 6:
+            raise RulePackError(f"{where}: 曜日は 0(月)〜6(日) または『月』〜『日』で指定してください: {v!r}")
+        out.add(v)
+    return frozenset(out)
+
+
+def _render_prompt_rules(name: str, closed_weekdays, closed_month_days, area_weekdays, notes) -> str:
+    lines = [f"- 対象自治体: {name}"]
+    closed = [f"{_WEEKDAY_JA[w]}曜日" for w in sorted(closed_weekdays)]
+    closed += [f"{m}月{d}日" for m, d in sorted(closed_month_days)]
+    if closed:
+        lines.append(f"- 一律回収不可: {' / '.join(closed)}（住所が未取得でも『不可』と即答してよい）")
+    for area, days in area_weekdays:
+        lines.append(f"- {area}の収集曜日: {'・'.join(_WEEKDAY_JA[w] for w in sorted(days))}")
+    lines += [f"- {n}" for n in notes]
+    return "\n".join(lines)
+
+
+def compile_pack(raw: Mapping[str, Any], default_id: str = "") -> RulePack:
+    """JSON 由来の dict を検証し、不変の RulePack にコンパイルする。"""
+    pack_id = str(raw.get("id") or default_id)
+    if not pack_id:
+        raise RulePackError("id がありません")
+    where = f"rulepack[{pack_id}]"
+    name = str(raw.get("name") or pack_id)
+
+    catalog = raw.get("catalog") or {}
+    try:
+        prices = {str(k): int(v) for k, v in (catalog.get("items") or {}).items()}
+        default_price = int(catalog.get("default_price", 500))
+    except (TypeError, ValueError) as e:
+        raise RulePackError(f"{where}.catalog: 料金は整数で指定してください ({e})") from e
+
+    sched = raw.get("schedule") or {}
+    closed_weekdays = _weekdays(sched.get("closed_weekdays") or [], f"{where}.schedule.closed_weekdays")
+    month_days, iso_dates = set(), set()
+    for v in sched.get("closed_dates") or []:
+        try:
+            if len(v) == 5:                     # MM-DD（毎年）
+                m, d = (int(x) for x in v.split("-"))
+                _dt.date(2000, m, d)
+                month_days.add((m, d))
+            else:                               # YYYY-MM-DD（その日だけ）
+                iso_dates.add(_dt.date.fromisoformat(v).isoformat())
+        except (TypeError, ValueError) as e:
+            raise RulePackError(f"{where}.schedule.closed_dates: 日付形式エラー {v!r}") from e
+    areas = sorted(
+        ((str(a), _weekdays(ws, f"{where}.schedule.area_weekdays[{a}]"))
+         for a, ws in (sched.get("area_weekdays") or {}).items()),
+        key=lambda t: -len(t[0]),
+    )
+
+    faq = raw.get("faq") or {}
+    entries = []
+    for i, e in enumerate(faq.get("entries") or []):
+        kws = tuple(str(k) for k in e.get("keywords") or [])
+        if not kws or not e.get("answer"):
+            raise RulePackError(f"{where}.faq.entries[{i}]: keywords と answer が必要です")
+        entries.append((kws, str(e["answer"])))
+
+    prompt = raw.get("prompt") or {}
+    fields = raw.get("fields") or {}
+    return RulePack(
+        id=pack_id,
+        name=name,
+        default_price=default_price,
+        prices=MappingProxyType(prices),
+        closed_weekdays=closed_weekdays,
+        closed_month_days=frozenset(month_days),
+        closed_iso_dates=frozenset(iso_dates),
+        area_weekdays=tuple(areas),
+        faq_entries=tuple(entries),
+        faq_default=str(faq.get("default") or "市の粗大ごみ案内ページをご確認ください。"),
+        prompt_rules=_render_prompt_rules(name, closed_weekdays, month_days, areas, prompt.get("notes") or []),
+        field_labels=MappingProxyType(dict(fields.get("labels") or {})),
+        field_examples=MappingProxyType(dict(fields.get("examples") or {})),
+    )
+
+
+def load_pack_file(path: str) -> RulePack:
+    with open(path, encoding="utf-8") as f:
+        try:
+            raw = json.load(f)
+        except ValueError as e:
+            raise RulePackError(f"{path}: JSON として読み込めません ({e})") from e
+    return compile_pack(raw, default_id=os.path.splitext(os.path.basename(path))[0])
@@ -20,4 +20,101 @@ def test_agent_simple_flow():
         context_today_iso=today,
         request=req
     ))
-    assert out.kind in ("ask","review","answer","error")
\ No newline at end of file
+    assert out.kind in ("ask","review","answer","error")
+
+def test_precompute_tools_when_inputs_known():
+    from agents.garbage.agent import _precompute_tools, _iteration_budget
+    req = GarbageRequest(address="大阪市北区中之島1-1-1", preferred_date="2025-08-24",
+                         item_description="ソファ", quantity=2)
+    pre = _precompute_tools(req, "住所は大阪市北区中之島1-1-1です", "2025-08-20")
+    assert pre["check_collectible"] == "2025-08-24: ng: 日曜日は回収不可です"
+    assert '"subtotal": 2400' in pre["estimate_fee"]
+    assert "resolve_date" not in pre
+    # 解決すべきツールが無くても、ツール1回＋最終応答1回ぶんは確保する
+    assert _iteration_budget(pre, "住所は大阪市北区中之島1-1-1です") == 2
+
+
+def test_precompute_resolves_relative_date_for_collectible_check():
+    from agents.garbage.agent import _precompute_tools, _iteration_budget
+    req = GarbageRequest(address="大阪市北区中之島1-1-1")
+    pre = _precompute_tools(req, "明日でお願いします", "2025-08-20")
+    assert pre["resolve_date"].endswith("2025-08-21")
+    assert pre["check_collectible"] == "2025-08-21: ok"
+    assert _iteration_budget(pre, "明日でお願いします") == 2
+    # 質問（rag_search など）1回＋最終応答、日付の解決も残っていれば上限の3
+    assert _iteration_budget({}, "2mを超える棚は出せますか？") == 2
+    assert _iteration_budget({}, "来週の火曜に出せますか？") == 3
+
+
+@pytest.mark.parametrize("utterance", ["来週の火曜でお願いします", "来月の第2火曜でお願いします"])
+def test_partial_date_phrase_is_left_to_agent(utterance):
+    from agents.garbage.agent import _precompute_tools, _iteration_budget
+    req = GarbageRequest(address="大阪市北区中之島1-1-1", preferred_date="2025-08-22")
+    pre = _precompute_tools(req, utterance, "2025-08-20")
+    # 表現の一部（『火曜』）だけで日付を決めたり、その日付で可否判定したりしない
+    assert "resolve_date" not in pre
+    assert "check_collectible" not in pre
+    assert _iteration_budget(pre, utterance) == 2
+
+
+@pytest.mark.parametrize("utterance", ["やっぱり来週火曜に変更で", "あさってに変更で", "10/3に変更で"])
+def test_unresolved_date_does_not_reuse_old_date(utterance):
+    from agents.garbage.agent import _precompute_tools
+    req = GarbageRequest(address="大阪市北区中之島1-1-1", preferred_date="2025-08-24")
+    pre = _precompute_tools(req, utterance, "2025-08-20")
+    # 日付を変えようとしている発話で、変更前の日付（日曜）の可否判定を載せない
+    assert "resolve_date" not in pre
+    assert "check_collectible" not in pre
+
+
+def test_resolved_date_takes_precedence_over_old_date():
+    from agents.garbage.agent import _precompute_tools
+    req = GarbageRequest(address="大阪市北区中之島1-1-1", preferred_date="2025-08-24")
+    pre = _precompute_tools(req, "やっぱり明後日に変更で", "2025-08-20")
+    assert pre["check_collectible"] == "2025-08-22: ok"
+
+
+def _fake_executor(responses, max_iterations):
+    from langchain.agents import AgentExecutor, create_tool_calling_agent
+    from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+    from langchain_core.tools import tool
+
+    class _FakeToolModel(FakeMessagesListChatModel):
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+    calls = []
+
+    @tool
+    def spy(text: str) -> str:
+        """テスト用ツール"""
+        calls.append(text)
+        return "ok"
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("human", "{input}"), MessagesPlaceholder("agent_scratchpad"),
+    ])
+    agent = create_tool_calling_agent(_FakeToolModel(responses=responses), [spy], prompt)
+    return AgentExecutor(agent=agent, tools=[spy], max_iterations=max_iterations), calls
+
+
+def test_invoke_agent_exits_on_marker_without_running_tool():
+    from langchain_core.messages import AIMessage
+    from agents.garbage.agent import _invoke_agent
+    msg = AIMessage(content="[ASK]\nこの日付でよろしいですか？",
+                    tool_calls=[{"name": "spy", "args": {"text": "x"}, "id": "c1"}])
+    executor, calls = _fake_executor([msg], max_iterations=3)
+    out = _invoke_agent(executor, {"input": "来週の火曜"})
+    assert out.startswith("[ASK]")
+    assert calls == []
+
+
+def test_invoke_agent_returns_empty_on_iteration_limit():
+    from langchain_core.messages import AIMessage
+    from agents.garbage.agent import _invoke_agent
+    msg = AIMessage(content="", tool_calls=[{"name": "spy", "args": {"text": "x"}, "id": "c1"}])
+    executor, calls = _fake_executor([msg, msg], max_iterations=2)
+    # 強制停止メッセージを住民に見せず、呼び出し側の定型質問に任せる
+    assert _invoke_agent(executor, {"input": "来週の火曜"}) == ""
+    assert len(calls) == 2
@@ -0,0 +1,78 @@
+from agents.garbage.schema import AgentInput, GarbageRequest
+from orchestrator.handlers import (
+    answer_faq, answer_greeting, answer_thanks, answer_other_service, handle_confirmation,
+)
+
+_FULL = GarbageRequest(
+    name="アイウエオ タロウ", address="大阪市北区中之島1-1-1", phone="09012345678",
+    item_description="ソファ", quantity=1, preferred_date="2025-08-22",
+    time_slot="午前", pickup_location="自宅前",
+)
+
+
+def _input(utterance, request=None, **kw):
+    return AgentInput(thread_id="t1", user_utterance=utterance, context_today_iso="2025-08-20",
+                      request=request or GarbageRequest(), **kw)
+
+
+def test_confirm_affirm_reserves():
+    out = handle_confirmation(_input("はい", _FULL, pending_confirmation=True))
+    assert out.kind == "answer"
+    assert "予約完了" in out.message
+    assert "2025-08-22（午前）" in out.message
+    assert "ソファ × 1点" in out.message
+    assert out.request == _FULL
+
+
+def test_confirm_negative_asks_what_to_fix():
+    out = handle_confirmation(_input("いいえ", _FULL, pending_confirmation=True))
+    assert out.kind == "answer"
+    assert "どの項目を修正しますか" in out.message
+
+
+def test_confirm_other_reprompts_with_review():
+    out = handle_confirmation(_input("うーん", _FULL, pending_confirmation=True,
+                                     last_review_text="【確認】ソファ1点"))
+    assert out.kind == "review"
+    assert out.message.startswith("【確認】ソファ1点\n")
+    assert "『はい』または『いいえ』" in out.message
+
+
+def test_faq_answers_then_asks_next_field():
+    out = answer_faq(_input("最大サイズはどれくらい？"))
+    assert out.kind == "ask"
+    assert "2m" in out.message
+    assert out.next_field == "name"
+
+
+def test_other_service_redirects():
+    out = answer_other_service(_input("エアコンを処分したい"))
+    assert "家電リサイクル" in out.message
+    assert out.next_field == "name"
+
+
+def test_thanks_after_booking_is_closing_reply():
+    out = answer_thanks(_input("ありがとうございました", _FULL))
+    assert out.kind == "answer"
+    assert out.message.startswith("ご利用ありがとうございました")
+    assert "こんにちは" not in out.message
+
+
+def test_greeting_returns_to_slots():
+    out = answer_greeting(_input("こんにちは"))
+    assert out.kind == "ask"
+    assert out.message.startswith("こんにちは")
+
+
+def test_route_skips_history_for_handlers_without_llm(monkeypatch):
+    from orchestrator import router
+
+    calls = []
+    monkeypatch.setattr(router.history, "summarizer", lambda prev, turns: calls.append(turns) or "要約")
+    router.stats.reset()
+    msgs = [("user", "来週火曜にソファを出したいです。" * 20), ("assistant", "承知しました。" * 20)] * 20
+    out, _ = router.route("t-greet", "こんにちは", GarbageRequest(), messages=msgs)
+    assert out.kind == "ask"
+    # 挨拶では履歴窓を作らない（LLM 要約も走らない）ので、LLM なしのターンとして数える
+    assert calls == []
+    assert router.stats.snapshot()["no_llm_share"] == 1.0
@@ -0,0 +1,81 @@
+from memory.history import ConversationHistory, estimate_tokens
+
+
+def _conv(turns: int):
+    msgs = []
+    for i in range(turns):
+        msgs.append(("user", f"{i}番目の質問です。来週火曜にソファを出したいです。"))
+        msgs.append(("assistant", f"{i}番目の回答です。次にご住所を教えてください。"))
+    return msgs
+
+
+def test_window_stays_within_budget_on_long_conversation():
+    hist = ConversationHistory(max_tokens=300, summary_max_tokens=80)
+    msgs = _conv(60)
+    for i in range(2, len(msgs) + 1, 2):
+        w = hist.build("t1", msgs[:i])
+        assert w.prompt_tokens <= 300
+    assert w.recent[-1] == msgs[-1]
+    assert w.summary
+
+
+def test_single_line_summary_is_clipped_to_budget():
+    # 改行なしの段落を返す要約器（LLM 要約を想定）でも、前回の要約ごと予算内に切り詰める
+    def summarizer(prev, turns):
+        return prev + "".join(c for _, c in turns)
+
+    hist = ConversationHistory(max_tokens=300, summary_max_tokens=80, summarizer=summarizer)
+    msgs = _conv(40)
+    for i in range(2, len(msgs) + 1, 2):
+        w = hist.build("t1", msgs[:i])
+        assert w.prompt_tokens <= 300
+    assert estimate_tokens(w.summary) <= 80
+    assert w.summary.startswith("…")
+
+
+def test_summarizer_runs_outside_lock():
+    hist = ConversationHistory(max_tokens=100, summary_max_tokens=20)
+    locked = []
+
+    def summarizer(prev, turns):
+        locked.append(hist._lock.locked())
+        return "要約"
+
+    hist.summarizer = summarizer
+    hist.build("t1", _conv(20))
+    assert locked == [False]
+
+
+def test_summary_is_incremental_per_thread():
+    calls = []
+
+    def summarizer(prev, turns):
+        calls.append(len(turns))
+        return (prev + "\n" if prev else "") + f"{len(turns)}ターン要約"
+
+    hist = ConversationHistory(max_tokens=200, summary_max_tokens=50, summarizer=summarizer)
+    msgs = _conv(30)
+    hist.build("t1", msgs)
+    evicted = sum(calls)
+    # 同じ履歴で再構築しても要約器は呼ばれない
+    hist.build("t1", msgs)
+    assert sum(calls) == evicted
+    # 伸びた分だけが新たに要約される
+    hist.build("t1", msgs + _conv(1))
+    assert sum(calls) - evicted <= 2
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("粗大ごみ") == 4
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_summary_cache_evicts_least_recently_used_thread():
+    hist = ConversationHistory(max_threads=2)
+    msgs = _conv(2)
+    hist.build("a", msgs)
+    hist.build("b", msgs)
+    hist.build("a", msgs)      # a を最近使ったことにする
+    hist.build("c", msgs)
+    assert list(hist._states) == ["a", "c"]
@@ -0,0 +1,61 @@
+import pytest
+
+from orchestrator.intent import (
+    classify, CONFIRM, FAQ, GREETING, THANKS, OTHER_SERVICE, SLOT_FILLING,
+)
+from orchestrator.metrics import RouterStats
+
+
+@pytest.mark.parametrize("utterance,expected", [
+    ("こんにちは", GREETING),
+    ("最大サイズはどれくらい？", FAQ),
+    ("粗大ごみの出し方は？", FAQ),
+    ("エアコンを処分したい", OTHER_SERVICE),
+    ("テレビを捨てたい", OTHER_SERVICE),
+    # 家電名を含んでも家具なら粗大ごみ
+    ("テレビ台を出したい", SLOT_FILLING),
+    ("洗濯機ラックを出したい", SLOT_FILLING),
+    ("冷蔵庫の横にある棚を出したい", SLOT_FILLING),
+    ("ありがとうございました", THANKS),
+    ("来週火曜にソファ1点を自宅前で回収してほしい", SLOT_FILLING),
+    ("大阪市北区中之島1-1-1", SLOT_FILLING),
+    ("アイウエオ タロウです", SLOT_FILLING),
+    # 挨拶と申込情報が混在する場合はフルのエージェントへ
+    ("こんにちは、ソファを回収してほしい", SLOT_FILLING),
+    ("こんにちは、マットレスを出したい", SLOT_FILLING),
+    ("ありがとう、ソファもお願いします", SLOT_FILLING),
+    # 確信が持てない発話もフルのエージェントへ
+    ("机です", SLOT_FILLING),
+])
+def test_classify(utterance, expected):
+    assert classify(utterance).name == expected
+
+
+def test_classify_pending_confirmation():
+    assert classify("はい", pending_confirmation=True).name == CONFIRM
+    assert classify("希望日を変えたい", pending_confirmation=True).name == CONFIRM
+    # 確認待ちでない『はい』は日付確認などへの返答なのでエージェントへ
+    assert classify("はい").name == SLOT_FILLING
+
+
+def test_router_stats():
+    s = RouterStats()
+    s.record(FAQ, 1.0, used_llm=False)
+    s.record(SLOT_FILLING, 900.0, used_llm=True, llm_calls=2)
+    s.record(GREETING, 0.5, used_llm=False)
+    snap = s.snapshot()
+    assert snap["turns"] == 3
+    assert snap["no_llm_share"] == pytest.approx(2 / 3)
+    assert snap["intents"][SLOT_FILLING]["p95_ms"] == 900.0
+    assert snap["intents"][SLOT_FILLING]["llm_calls_per_turn"] == 2
+    assert snap["intents"][FAQ]["llm_calls_per_turn"] == 0
+
+
+def test_router_stats_keeps_recent_samples_only():
+    s = RouterStats(max_samples=3)
+    for ms in (100.0, 1.0, 2.0, 3.0):
+        s.record(FAQ, ms, used_llm=False)
+    snap = s.snapshot()["intents"][FAQ]
+    assert len(s._lat[FAQ]) == 3
+    assert snap["count"] == 4
+    assert snap["max_ms"] == 3.0
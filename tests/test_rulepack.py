@@ -0,0 +1,124 @@
+import datetime as dt
+import json
+import os
+import time
+
+import pytest
+
+from tenants.registry import RulePackRegistry, activate, current_pack, registry
+from tenants.rulepack import RulePackError, compile_pack
+
+
+def _write(d, name, raw, bump=0):
+    path = os.path.join(d, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(raw, f, ensure_ascii=False)
+    if bump:
+        t = time.time() + bump
+        os.utime(path, (t, t))
+    return path
+
+
+def test_default_pack_matches_previous_rules():
+    pack = registry.get()
+    assert pack.price("ソファ") == 1200
+    assert pack.price("未知の品目") == 500
+    assert pack.check_collectible(dt.date(2025, 8, 24)) == "ng: 日曜日は回収不可です"
+    assert pack.check_collectible(dt.date(2025, 12, 31)) == "ng: 祝日/年末年始は回収不可です"
+    assert pack.check_collectible(dt.date(2025, 8, 25)) == "ok"
+    assert "2m" in pack.faq("最大サイズは？")
+
+
+def test_compile_area_weekdays_and_immutability():
+    pack = compile_pack({
+        "id": "x", "name": "テスト市",
+        "catalog": {"items": {"机": 900}},
+        "schedule": {"closed_weekdays": ["日"], "area_weekdays": {"北区": ["月", "木"]}},
+    })
+    assert pack.check_collectible(dt.date(2025, 8, 25), "テスト市北区1-1") == "ok"            # 月
+    assert pack.check_collectible(dt.date(2025, 8, 26), "テスト市北区1-1").startswith("ng: 北区")  # 火
+    assert pack.check_collectible(dt.date(2025, 8, 26), "テスト市南区1-1") == "ok"
+    assert "一律回収不可: 日曜日" in pack.prompt_rules
+    with pytest.raises(TypeError):
+        pack.prices["机"] = 1
+    with pytest.raises(RulePackError):
+        compile_pack({"id": "bad", "schedule": {"closed_weekdays": [9]}})
+
+
+def test_hot_reload_swaps_atomically_and_keeps_old_on_error(tmp_path):
+    d = str(tmp_path)
+    _write(d, "a", {"id": "a", "catalog": {"items": {"机": 700}}})
+    reg = RulePackRegistry(pack_dir=d, default_id="a", check_interval=0.0)
+    old = reg.get("a")
+
+    _write(d, "a", {"id": "a", "catalog": {"items": {"机": 900}}}, bump=10)
+    _write(d, "b", {"id": "b"})
+    assert sorted(reg.reload()) == ["a", "b"]
+    assert reg.get("a").price("机") == 900
+    assert old.price("机") == 700          # 取得済みのパックは変わらない
+    assert reg.ids() == ["a", "b"]
+
+    # 壊れたパックは旧版を使い続ける
+    with open(os.path.join(d, "a.json"), "w") as f:
+        f.write("{broken")
+    os.utime(os.path.join(d, "a.json"), (time.time() + 20, time.time() + 20))
+    reg.reload()
+    assert reg.get("a").price("机") == 900
+
+    os.remove(os.path.join(d, "b.json"))
+    assert reg.reload() == ["b"]
+    assert reg.get("b").id == "a"           # 未登録は既定のパック
+
+    # 既定パックはファイルが消えても最後の版を保持する
+    os.remove(os.path.join(d, "a.json"))
+    assert reg.reload() == []
+    assert reg.get().price("机") == 900
+
+
+def test_reload_detects_rewrite_with_same_mtime(tmp_path):
+    d = str(tmp_path)
+    path = _write(d, "a", {"id": "a", "catalog": {"items": {"机": 700}}})
+    st = os.stat(path)
+    reg = RulePackRegistry(pack_dir=d, default_id="a", check_interval=0.0)
+
+    _write(d, "a", {"id": "a", "catalog": {"items": {"机": 1500}}})
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))   # mtime は据え置き
+    assert reg.reload() == ["a"]
+    assert reg.get("a").price("机") == 1500
+
+
+def test_activate_sets_current_pack():
+    pack = compile_pack({"id": "tmp", "catalog": {"default_price": 1}})
+    with activate(pack):
+        assert current_pack().price("なんでも") == 1
+    assert current_pack().id == registry.default_id
+
+
+def test_duplicate_pack_id_is_rejected_and_taken_over_on_delete(tmp_path, caplog):
+    d = str(tmp_path)
+    _write(d, "default", {"id": "default"})
+    _write(d, "kobe", {"id": "kobe", "catalog": {"items": {"机": 800}}})
+    reg = RulePackRegistry(pack_dir=d, check_interval=0.0)
+
+    # 後から同じ id を宣言したファイルは拒否し、既存の kobe を使い続ける
+    _write(d, "osaka", {"id": "kobe", "catalog": {"items": {"机": 100}}})
+    assert reg.reload() == []
+    assert reg.get("kobe").price("机") == 800
+    assert "拒否" in caplog.text
+
+    # 拒否された側を消しても kobe は残る
+    os.remove(os.path.join(d, "osaka.json"))
+    assert reg.reload() == []
+    assert reg.ids() == ["default", "kobe"]
+
+    # 採用中のファイルが消えたら、同じ id を持つ残りのファイルに切り替わる
+    _write(d, "osaka", {"id": "kobe", "catalog": {"items": {"机": 100}}})
+    reg.reload()
+    os.remove(os.path.join(d, "kobe.json"))
+    assert reg.reload() == ["kobe"]
+    assert reg.get("kobe").price("机") == 100
+
+
+def test_unknown_pack_id_falls_back_with_warning(caplog):
+    assert registry.get("no-such-city").id == registry.default_id
+    assert "no-such-city" in caplog.text
@@ -0,0 +1,113 @@
+import json
+import urllib.request
+
+import pytest
+
+from bench.stub_llm import start_in_background
+from tenants.registry import registry
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = start_in_background()
+    yield srv
+    srv.shutdown()
+
+
+def _post(srv, body):
+    req = urllib.request.Request(
+        srv.base_url + "/chat/completions",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req, timeout=5) as r:
+        return r.read().decode()
+
+
+_CONTEXT = """【状況コンテキスト】
+today_jst: 2025-08-20
+request (現時点の値):
+{"name": "アイウエオ タロウ", "address": null}
+missing: address
+"""
+
+
+def test_json_mode_extracts_fields(server):
+    raw = _post(server, {
+        "model": "stub", "response_format": {"type": "json_object"},
+        "messages": [{"role": "user", "content": "ソファ1点、電話は090-1234-5678、午前希望"}],
+    })
+    fields = json.loads(json.loads(raw)["choices"][0]["message"]["content"])
+    assert fields["item_description"] == "ソファ"
+    assert fields["quantity"] == 1
+    assert fields["phone"] == "09012345678"
+    assert fields["time_slot"] == "午前"
+
+
+def test_tool_call_for_relative_date(server):
+    tools = [{"type": "function", "function": {"name": "resolve_date", "parameters": {}}}]
+    body = {"model": "stub", "tools": tools,
+            "messages": [{"role": "system", "content": _CONTEXT},
+                         {"role": "user", "content": "来週金曜にお願いします"}]}
+    choice = json.loads(_post(server, body))["choices"][0]
+    assert choice["finish_reason"] == "tool_calls"
+    call = choice["message"]["tool_calls"][0]
+    assert call["function"]["name"] == "resolve_date"
+    # 基準日はサーバーの時計ではなく context の today_jst
+    assert json.loads(call["function"]["arguments"])["base_date"] == "2025-08-20"
+
+    # ツール結果が返ってきたら契約どおりの最終応答
+    body["messages"] += [choice["message"],
+                         {"role": "tool", "tool_call_id": call["id"], "content": "2025-08-29"}]
+    text = json.loads(_post(server, body))["choices"][0]["message"]["content"]
+    assert text.startswith("[ASK]")
+    # 質問文のラベルはルールパックと同じ
+    assert registry.get().field_label("address") in text
+    payload = text.split("[REQUEST_JSON]")[1].split("[/REQUEST_JSON]")[0]
+    assert json.loads(payload)["preferred_date"] == "2025-08-29"
+
+
+def test_streaming(server):
+    raw = _post(server, {
+        "model": "stub", "stream": True,
+        "messages": [{"role": "system", "content": _CONTEXT},
+                     {"role": "user", "content": "住所は大阪市北区中之島1-1-1です"}],
+    })
+    events = [line[len("data: "):] for line in raw.splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(e) for e in events[:-1]]
+    text = "".join(c["choices"][0]["delta"].get("content") or "" for c in chunks)
+    assert text.startswith("[ASK]") or text.startswith("[REVIEW]")
+    assert "[REQUEST_JSON]" in text
+    assert chunks[-1]["usage"]["completion_tokens"] > 0
+
+
+def test_no_tool_call_when_date_is_precomputed(server):
+    tools = [{"type": "function", "function": {"name": "resolve_date", "parameters": {}}}]
+    context = _CONTEXT + "precomputed_tools (事前計算済み・再実行不要):\n- resolve_date: 『来週金曜』→ 2025-08-29\n"
+    choice = json.loads(_post(server, {
+        "model": "stub", "tools": tools,
+        "messages": [{"role": "system", "content": context},
+                     {"role": "user", "content": "来週金曜にお願いします"}],
+    }))["choices"][0]
+    assert choice["finish_reason"] == "stop"
+    text = choice["message"]["content"]
+    payload = text.split("[REQUEST_JSON]")[1].split("[/REQUEST_JSON]")[0]
+    assert json.loads(payload)["preferred_date"] == "2025-08-29"
+
+
+def test_labels_follow_context_municipality(server, tmp_path, monkeypatch):
+    import bench.stub_llm as stub
+    from tenants.registry import RulePackRegistry
+    for pid, label in (("default", "ご住所"), ("kobe", "お住まいの住所")):
+        (tmp_path / f"{pid}.json").write_text(
+            json.dumps({"id": pid, "fields": {"labels": {"address": label}}}, ensure_ascii=False),
+            encoding="utf-8")
+    monkeypatch.setattr(stub, "rulepacks", RulePackRegistry(pack_dir=str(tmp_path)))
+    context = _CONTEXT.replace("today_jst: 2025-08-20\n", "today_jst: 2025-08-20\nmunicipality: kobe\n")
+    text = json.loads(_post(server, {
+        "model": "stub",
+        "messages": [{"role": "system", "content": context},
+                     {"role": "user", "content": "よろしくお願いします"}],
+    }))["choices"][0]["message"]["content"]
+    assert "**お住まいの住所**" in text